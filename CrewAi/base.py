@@ -1,102 +1,183 @@
-from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from crewai import Agent, Task, Crew, LLM
+import contextvars
 import os
+from crewai.events import BaseEventListener, LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent
+from crewai.llms.hooks import BaseInterceptor
 from crewai.tools import tool
-import subprocess
-import tempfile
-
-# Set up the language model (replace with your preferred LLM)
-llm = ChatOpenAI(
-    model="gpt-4-turbo",
-    temperature=0.7,
-    api_key=os.getenv("OPENAI_API_KEY")
-)
-
-# Create a local code interpreter tool using the tool decorator
-@tool("Code Interpreter")
-def local_code_interpreter(code: str, libraries_used: str = None) -> str:
-    """
-    Execute Python code locally without Docker.
-    
-    Args:
-        code: Python code to execute
-        libraries_used: Optional comma-separated list of libraries to install (e.g., 'numpy,pandas,plotly')
-    
-    Returns:
-        The output of the executed code
-    """
-    # Install any required libraries if specified
-    if libraries_used:
-        libs = [lib.strip() for lib in libraries_used.split(',')]
-        for lib in libs:
-            try:
-                subprocess.run(
-                    ["pip", "install", lib],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-            except Exception as e:
-                return f"Error installing {lib}: {str(e)}"
-    
-    # Write code to a temporary file
-    with tempfile.NamedTemporaryFile(suffix='.py', delete=False) as temp:
-        temp_filename = temp.name
-        temp.write(code.encode())
-    
-    try:
-        # Execute the code
-        result = subprocess.run(
-            ["python", temp_filename],
-            capture_output=True,
-            text=True
-        )
-        
-        # Clean up the temporary file
-        os.unlink(temp_filename)
-        
-        # Return the result
-        if result.returncode == 0:
-            return result.stdout
-        else:
-            return f"Error executing code: {result.stderr}"
-    except Exception as e:
-        # Clean up and return error
-        os.unlink(temp_filename)
-        return f"Error: {str(e)}"
+import httpx
+import threading
+import time
+import sys
+from typing import Callable, Optional
+from pydantic import PrivateAttr
+import interpreter
+from interpreter import INTERPRETER_MODE, get_worker_pool
+
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Create a package installer tool using the tool decorator
-@tool("Package Installer")
-def package_installer(package_list: str) -> str:
+from tools.tracing import payload_size, tracer
+from LLMs.rate_limiter import MAX_RETRIES, async_event_hooks, event_hooks
+
+class TracingEventListener(BaseEventListener):
+    """Records a span per LLM call (latency, tokens, payload sizes) when tracing is enabled.
+
+    CrewAI runs the handlers on its event bus's thread pool, so the spans are placed
+    by the events' timestamps rather than by when the handlers run.
     """
-    Install Python packages using pip.
-    
-    Args:
-        package_list: A comma-separated list of packages to install (e.g., 'numpy, pandas, matplotlib').
-    
-    Returns:
-        A string with the installation results.
+
+    def __init__(self):
+        self._started = {}
+        super().__init__()
+
+    @staticmethod
+    def _perf_time(event):
+        return time.perf_counter() - (time.time() - event.timestamp.timestamp())
+
+    def setup_listeners(self, crewai_event_bus):
+        @crewai_event_bus.on(LLMCallStartedEvent)
+        def on_start(source, event):
+            if tracer.enabled:
+                self._started[event.call_id] = (self._perf_time(event), payload_size(event.messages))
+
+        @crewai_event_bus.on(LLMCallCompletedEvent)
+        def on_completed(source, event):
+            started = self._started.pop(event.call_id, None)
+            if started is None:
+                return
+            usage = event.usage or {}
+            tracer.record("chat.completions", "model", started[0], self._perf_time(event), model=event.model,
+                          request_bytes=started[1], response_bytes=payload_size(event.response),
+                          prompt_tokens=usage.get("prompt_tokens", 0), completion_tokens=usage.get("completion_tokens", 0))
+
+        @crewai_event_bus.on(LLMCallFailedEvent)
+        def on_failed(source, event):
+            started = self._started.pop(event.call_id, None)
+            if started is not None:
+                tracer.record("chat.completions", "model", started[0], self._perf_time(event), model=event.model,
+                              request_bytes=started[1], error=event.error)
+
+class RateLimitInterceptor(BaseInterceptor[httpx.Request, httpx.Response]):
+    """Sends CrewAI's model requests through the process-wide rate limiter (LLMs/rate_limiter.py).
+
+    The interceptor runs in the transport, where responses don't carry their request
+    yet; the request is kept in a context variable between the two calls, which run
+    in the same thread or task.
     """
-    packages = [pkg.strip() for pkg in package_list.split(',')]
-    results = []
-    
-    for package in packages:
-        try:
-            result = subprocess.run(
-                ["pip", "install", package], 
-                capture_output=True, 
-                text=True, 
-                check=True
+
+    def __init__(self):
+        self._hooks = event_hooks()
+        self._async_hooks = async_event_hooks()
+        self._request = contextvars.ContextVar("rate_limited_request")
+
+    def on_outbound(self, message):
+        for hook in self._hooks["request"]:
+            hook(message)
+        self._request.set(message)
+        return message
+
+    def on_inbound(self, message):
+        message.request = self._request.get()
+        for hook in self._hooks["response"]:
+            hook(message)
+        return message
+
+    async def aon_outbound(self, message):
+        for hook in self._async_hooks["request"]:
+            await hook(message)
+        self._request.set(message)
+        return message
+
+    async def aon_inbound(self, message):
+        message.request = self._request.get()
+        for hook in self._async_hooks["response"]:
+            await hook(message)
+        return message
+
+_llm = None
+_tracing_listener = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """Return the shared language model, creating it on first use (replace with your preferred LLM)."""
+    global _llm, _tracing_listener
+    with _llm_lock:
+        if _llm is None:
+            # Spans for every model call; only recorded when TRACE_PATH is set
+            _tracing_listener = TracingEventListener()
+            _llm = LLM(
+                model="gpt-4-turbo",
+                temperature=0.7,
+                api_key=os.getenv("OPENAI_API_KEY"),
+                # Requests wait their turn in the process-wide rate limiter (LLMs/rate_limiter.py)
+                interceptor=RateLimitInterceptor(),
+                max_retries=MAX_RETRIES,
             )
-            results.append(f"Successfully installed {package}: {result.stdout}")
-        except subprocess.CalledProcessError as e:
-            results.append(f"Failed to install {package}: {e.stderr}")
-    
-    return "\n".join(results)
+        return _llm
+
+# The Code Interpreter and Package Installer (interpreter.py) as CrewAI tools
+local_code_interpreter = tool("Code Interpreter")(interpreter.local_code_interpreter)
+package_installer = tool("Package Installer")(interpreter.package_installer)
+
+class TaskTimings:
+    """Wall-clock timings of the tasks in one crew run, in seconds from kickoff."""
+
+    def __init__(self):
+        self.kickoff = None
+        self.started = {}
+        self.finished = {}
+
+    def start(self):
+        self.kickoff = time.perf_counter()
+        self.started = {}
+        self.finished = {}
+
+    def on_start(self, name):
+        """TimedTask hook that records when the crew started the task named `name`."""
+        def record():
+            self.started.setdefault(name, time.perf_counter() - self.kickoff)
+        return record
+
+    def callback(self, name):
+        """Task callback that records when the task named `name` finished."""
+        def record(output):
+            self.finished[name] = time.perf_counter() - self.kickoff
+        return record
+
+    def report(self):
+        """Per-task start/end/duration of the tasks that finished, in order of completion."""
+        report = {}
+        for name, end in sorted(self.finished.items(), key=lambda item: item[1]):
+            start = self.started.get(name, 0.0)
+            report[name] = {"start": start, "end": end, "duration": end - start}
+        return report
+
+class TimedTask(Task):
+    """A Task that calls `on_start` when the crew starts executing it (in its own thread, if async)."""
+
+    _on_start: Optional[Callable[[], None]] = PrivateAttr(default=None)
+
+    def __init__(self, on_start: Optional[Callable[[], None]] = None, **data):
+        super().__init__(**data)
+        self._on_start = on_start
+
+    def _started(self):
+        if self._on_start is not None:
+            self._on_start()
+
+    def execute_sync(self, *args, **kwargs):
+        self._started()
+        return super().execute_sync(*args, **kwargs)
+
+    def execute_async(self, *args, **kwargs):
+        self._started()
+        return super().execute_async(*args, **kwargs)
 
 # Define Agents
 class MarketResearchCrew:
     def __init__(self):
+        llm = get_llm()
+
         # Research Specialist Agent
         self.research_specialist = Agent(
             role="Market Research Specialist",
@@ -131,9 +212,26 @@ class MarketResearchCrew:
             tools=[local_code_interpreter, package_installer]
         )
 
-    def run_market_research(self, target_industry):
+        # Warm up the interpreter workers while the research tasks run
+        if INTERPRETER_MODE == "pool":
+            threading.Thread(target=get_worker_pool, daemon=True).start()
+
+        # Timings of the most recent run_market_research call
+        self.last_timings = {}
+
+    def run_market_research(self, target_industry, parallel=True):
+        """
+        Run the research crew for one industry.
+
+        With parallel=True the market research and competitive analysis tasks,
+        which don't depend on each other, run concurrently and the visualization
+        task starts once both have finished. Per-task timings are kept in
+        self.last_timings.
+        """
+        timings = TaskTimings()
+
         # Task 1: Market Trend Research
-        market_research_task = Task(
+        market_research_task = TimedTask(
             description=f"Conduct an in-depth market research analysis for the {target_industry} "
                         "industry. Identify key trends, market size, growth potential, "
                         "and emerging technologies. Provide a comprehensive overview.",
@@ -142,25 +240,35 @@ class MarketResearchCrew:
                             "- Current market size"
                             "- Projected growth rate"
                             "- Key emerging trends"
-                            "- Potential technological disruptions"
+                            "- Potential technological disruptions",
+            async_execution=parallel,
+            callback=timings.callback("market_research"),
+            on_start=timings.on_start("market_research")
         )
 
         # Task 2: Competitive Landscape Analysis
-        competitive_analysis_task = Task(
+        competitive_analysis_task = TimedTask(
             description=f"Analyze the competitive landscape in the {target_industry}. "
                         "Identify top players, their strengths, weaknesses, and unique positioning.",
             agent=self.competitive_intel_agent,
             expected_output="A comprehensive competitive analysis report including:"
                             "- Top 5 market competitors"
                             "- SWOT analysis for each competitor"
-                            "- Unique market positioning strategies"
+                            "- Unique market positioning strategies",
+            async_execution=parallel,
+            callback=timings.callback("competitive_analysis"),
+            on_start=timings.on_start("competitive_analysis")
         )
 
         # Task 3: Data Visualization
-        data_visualization_task = Task(
+        data_visualization_task = TimedTask(
             description="Create a python script that will create a plotly plot of the market research and competitive analysis findings. Save the plot as png file. If the Code Interpreter tool fails, provide detailed Python code that the user can run manually with clear instructions for setup and execution.",
             agent=self.data_viz_agent,
-            expected_output="Either a PNG visualization file saved in the current working directory, or detailed Python code with instructions for manual execution."
+            expected_output="Either a PNG visualization file saved in the current working directory, or detailed Python code with instructions for manual execution.",
+            # Waits for both research tasks and receives their outputs
+            context=[market_research_task, competitive_analysis_task],
+            callback=timings.callback("data_visualization"),
+            on_start=timings.on_start("data_visualization")
         )
 
         # Create the Crew
@@ -179,7 +287,13 @@ class MarketResearchCrew:
         )
 
         # Kick off the research
-        result = crew.kickoff(inputs={"target_industry": target_industry})
+        with tracer.span("crew.kickoff", kind="run", industry=target_industry):
+            timings.start()
+            result = crew.kickoff(inputs={"target_industry": target_industry})
+            self.last_timings = timings.report()
+            # One span per task (an agent's turn), placed under the kickoff span
+            for name, timing in self.last_timings.items():
+                tracer.record(name, "agent_turn", timings.kickoff + timing["start"], timings.kickoff + timing["end"])
         return result
 
 # Example Usage
@@ -194,6 +308,12 @@ def main():
         # Try running the crew workflow
         research_results = market_research_crew.run_market_research(target_industry)
         print(research_results)
+
+        print("Task timings (seconds from kickoff):")
+        for name, timing in market_research_crew.last_timings.items():
+            print(f"- {name}: {timing['start']:.1f} -> {timing['end']:.1f} ({timing['duration']:.1f}s)")
+        if tracer.enabled:
+            print(tracer.format_summary())
     except Exception as e:
         # If an error occurs, especially with the Code Interpreter
         print(f"Error running CrewAI workflow: {e}")
@@ -223,11 +343,24 @@ if __name__ == "__main__":
 """
 Prerequisites:
 1. Install required libraries:
-   pip install crewai langchain-openai
+   pip install crewai
 
 2. Set up OpenAI API Key:
    export OPENAI_API_KEY='your-openai-api-key'
 
+3. Optionally configure the Code Interpreter:
+   CODE_INTERPRETER_MODE=pool|subprocess   (default: pool of warm worker processes)
+   CODE_INTERPRETER_PRELOAD=pandas,plotly  (modules each worker imports at startup)
+   CODE_INTERPRETER_TIMEOUT=120            (wall-clock seconds per execution)
+   CODE_INTERPRETER_CPU_SECONDS=60         (CPU seconds per execution)
+   CODE_INTERPRETER_MEMORY_MB=2048         (address-space cap per interpreter process)
+   CODE_INTERPRETER_OUTPUT_BYTES=65536     (output kept per stream; the head and tail of longer output)
+   PIP_WHEEL_CACHE_DIR=~/.cache/wheels     (local wheel cache so package installs work offline)
+
+4. Optionally trace the run (model calls, tools and tasks):
+   TRACE_PATH=trace.jsonl  (or trace.json for a Chrome trace); summarize with
+   python -m tools.tracing trace.jsonl
+
 Notes:
 - This example uses OpenAI's GPT model, but CrewAI supports multiple LLMs
 - Customize agents, tasks, and workflows to fit specific research needs
@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from base import MarketResearchCrew
+
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from LLMs.rate_limiter import BATCH, request_priority
+
+# Batch runner: researches many industries on a bounded pool of worker threads.
+# All workers share base.py's LLM client (and so its connection pool), and each
+# worker builds its MarketResearchCrew agents once and reuses them for every
+# industry it runs. Results are appended to a JSONL file as soon as each industry
+# finishes, and industries already in that file are skipped, so a crashed batch
+# can be resumed by running the same command again.
+
+_local = threading.local()
+
+
+def _worker_crew() -> MarketResearchCrew:
+    """The calling worker's crew, built on its first industry."""
+    if not hasattr(_local, "crew"):
+        _local.crew = MarketResearchCrew()
+    return _local.crew
+
+
+def completed_industries(output_path: str) -> set:
+    """Industries with a successful result in `output_path` (a torn last line is ignored)."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                done.add(record["industry"])
+    return done
+
+
+def _research(industry: str, parallel_tasks: bool) -> dict:
+    crew = _worker_crew()
+    start = time.perf_counter()
+    try:
+        # Batch requests queue behind interactive ones in the shared rate limiter
+        with request_priority(BATCH):
+            result = crew.run_market_research(industry, parallel=parallel_tasks)
+        return {
+            "industry": industry,
+            "status": "ok",
+            "result": str(result),
+            "timings": crew.last_timings,
+            "duration": time.perf_counter() - start,
+        }
+    except Exception as e:
+        return {
+            "industry": industry,
+            "status": "error",
+            "error": str(e),
+            "duration": time.perf_counter() - start,
+        }
+
+
+def run_batch(industries, output_path: str, max_workers: int = 4, parallel_tasks: bool = True) -> dict:
+    """
+    Research every industry not already completed in `output_path`.
+
+    Returns counts of {"ok", "error", "skipped"} for this invocation.
+    """
+    done = completed_industries(output_path)
+    pending = [industry for industry in dict.fromkeys(industries) if industry not in done]
+    counts = {"ok": 0, "error": 0, "skipped": len(set(industries)) - len(pending)}
+
+    with open(output_path, "a") as output, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Terminate a line torn by a previous crash so new records start cleanly
+        if output.tell() > 0:
+            with open(output_path, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    output.write("\n")
+        futures = [executor.submit(_research, industry, parallel_tasks) for industry in pending]
+        for future in as_completed(futures):
+            record = future.result()
+            # Only the main thread writes, one complete line per industry
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            counts[record["status"]] += 1
+            print(f"[{sum(counts.values())}/{len(set(industries))}] {record['industry']}: "
+                  f"{record['status']} ({record['duration']:.1f}s)")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the market research crew for many industries")
+    parser.add_argument("industries", nargs="+", help="Industry names, or a single file with one industry per line")
+    parser.add_argument("--output", default="market_research.jsonl", help="JSONL file to append results to (and resume from)")
+    parser.add_argument("--workers", type=int, default=4, help="Industries researched at the same time")
+    parser.add_argument("--sequential-tasks", action="store_true", help="Run each crew's tasks one after another")
+    args = parser.parse_args()
+
+    industries = args.industries
+    if len(industries) == 1 and os.path.isfile(industries[0]):
+        with open(industries[0]) as f:
+            industries = [line.strip() for line in f if line.strip()]
+
+    counts = run_batch(industries, args.output, max_workers=args.workers, parallel_tasks=not args.sequential_tasks)
+    print(f"Done: {counts['ok']} succeeded, {counts['error']} failed, {counts['skipped']} already complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import importlib
+import importlib.metadata
+import os
+import re
+import subprocess
+import sys
+import threading
+
+# Batched, memoized package installation for the CrewAI tools.
+# Requirements already present in the environment are detected in-process with
+# importlib.metadata, and everything missing is installed with a single pip call.
+
+try:
+    from packaging.requirements import InvalidRequirement, Requirement
+except ImportError:  # packaging is optional; without it version specifiers are ignored
+    Requirement = None
+
+# Optional directory of wheels; when set, installs are tried offline from it first
+# and wheels downloaded from the index are kept there for next time.
+WHEEL_CACHE_DIR = os.getenv("PIP_WHEEL_CACHE_DIR")
+
+# Requirements known to be satisfied for the lifetime of this process
+_satisfied = set()
+_install_lock = threading.Lock()
+
+
+class InstallResult:
+    def __init__(self, ok: bool, installed=(), already_satisfied=(), output: str = ""):
+        self.ok = ok
+        self.installed = list(installed)
+        self.already_satisfied = list(already_satisfied)
+        self.output = output
+
+    def __str__(self):
+        lines = []
+        if self.already_satisfied:
+            lines.append(f"Already installed: {', '.join(self.already_satisfied)}")
+        if self.installed:
+            lines.append(f"Successfully installed: {', '.join(self.installed)}")
+        if not self.ok:
+            lines.append(f"Failed to install packages: {self.output}")
+        return "\n".join(lines)
+
+
+def parse_package_list(package_list: str) -> list:
+    """Split a comma-separated package list, dropping blanks and duplicates."""
+    return list(dict.fromkeys(pkg.strip() for pkg in package_list.split(',') if pkg.strip()))
+
+
+def is_satisfied(requirement: str) -> bool:
+    """Check whether `requirement` (e.g. 'pandas' or 'plotly>=5') is already installed."""
+    if requirement in _satisfied:
+        return True
+
+    if Requirement is not None:
+        try:
+            parsed = Requirement(requirement)
+        except InvalidRequirement:
+            return False
+        name, specifier = parsed.name, parsed.specifier
+    else:
+        name = re.split(r"[<>=!~;\[ ]", requirement, maxsplit=1)[0]
+        specifier = None
+        if name != requirement:
+            # Can't evaluate version specifiers without packaging; let pip decide
+            return False
+
+    try:
+        version = importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return False
+    if specifier and not specifier.contains(version, prereleases=True):
+        return False
+
+    _satisfied.add(requirement)
+    return True
+
+
+def _pip(*args) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "pip", *args],
+        capture_output=True,
+        text=True,
+    )
+
+
+def install_packages(packages: list) -> InstallResult:
+    """Install every missing requirement in `packages` with a single pip invocation."""
+    with _install_lock:
+        importlib.invalidate_caches()
+        present = [pkg for pkg in packages if is_satisfied(pkg)]
+        missing = [pkg for pkg in packages if pkg not in present]
+        if not missing:
+            return InstallResult(True, already_satisfied=present)
+
+        if WHEEL_CACHE_DIR:
+            os.makedirs(WHEEL_CACHE_DIR, exist_ok=True)
+            offline = ["install", "--no-index", "--find-links", WHEEL_CACHE_DIR, *missing]
+            result = _pip(*offline)
+            if result.returncode != 0:
+                # Fill the wheel cache from the index, then install from it
+                result = _pip("wheel", "--wheel-dir", WHEEL_CACHE_DIR, *missing)
+                if result.returncode == 0:
+                    result = _pip(*offline)
+        else:
+            result = _pip("install", *missing)
+
+        if result.returncode != 0:
+            return InstallResult(False, already_satisfied=present, output=result.stderr or result.stdout)
+
+        _satisfied.update(missing)
+        importlib.invalidate_caches()
+        return InstallResult(True, installed=missing, already_satisfied=present, output=result.stdout)
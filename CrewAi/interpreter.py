@@ -0,0 +1,115 @@
+import atexit
+import os
+import sys
+import tempfile
+import threading
+
+from worker_pool import WorkerPool
+from installer import install_packages, parse_package_list
+from sandbox import Limits, SandboxResult, run_sandboxed
+
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.tracing import tracer
+
+# The Code Interpreter and Package Installer behind base.py's CrewAI tools, as plain
+# functions. This module doesn't import crewai or langchain, so processes that only
+# run code (test_interpreter.py, worker processes) don't pay for loading them:
+#
+#     from interpreter import local_code_interpreter
+#     print(local_code_interpreter("print(1 + 1)"))
+
+# How the Code Interpreter runs snippets: "pool" reuses warm worker processes,
+# "subprocess" starts a fresh python process for every snippet
+INTERPRETER_MODE = os.getenv("CODE_INTERPRETER_MODE", "pool")
+INTERPRETER_PRELOAD = os.getenv("CODE_INTERPRETER_PRELOAD", "pandas,plotly")
+INTERPRETER_TIMEOUT = float(os.getenv("CODE_INTERPRETER_TIMEOUT", "120"))
+# CPU time, memory and output limits (CODE_INTERPRETER_CPU_SECONDS, _MEMORY_MB, _OUTPUT_BYTES)
+INTERPRETER_LIMITS = Limits.from_env(wall_seconds=INTERPRETER_TIMEOUT)
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+def get_worker_pool() -> WorkerPool:
+    """Return the shared interpreter pool, starting and pre-warming it on first use."""
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            preload = [m.strip() for m in INTERPRETER_PRELOAD.split(',') if m.strip()]
+            _worker_pool = WorkerPool(
+                size=2,
+                preload=preload,
+                timeout=INTERPRETER_LIMITS.wall_seconds,
+                memory_limit_mb=INTERPRETER_LIMITS.memory_mb,
+                cpu_seconds=INTERPRETER_LIMITS.cpu_seconds,
+                output_bytes=INTERPRETER_LIMITS.output_bytes,
+                max_output_bytes=INTERPRETER_LIMITS.max_output_bytes,
+            ).start()
+            atexit.register(_worker_pool.close)
+        return _worker_pool
+
+def run_in_subprocess(code: str) -> SandboxResult:
+    """Execute code in a fresh python process (the fallback mode)."""
+    # Write code to a temporary file
+    with tempfile.NamedTemporaryFile(suffix='.py', delete=False) as temp:
+        temp_filename = temp.name
+        temp.write(code.encode())
+
+    try:
+        return run_sandboxed([sys.executable, temp_filename], INTERPRETER_LIMITS)
+    finally:
+        os.unlink(temp_filename)
+
+def format_result(result: SandboxResult) -> str:
+    """What the agent sees: the output, plus the run's status when it failed or was cut short."""
+    if result.ok and not result.truncated:
+        return result.stdout
+    if result.ok:
+        return f"{result.stdout}\n{result.summary()}"
+    return f"Error executing code: {result.stderr}\n{result.summary()}"
+
+def local_code_interpreter(code: str, libraries_used: str = None) -> str:
+    """
+    Execute Python code locally without Docker.
+
+    Args:
+        code: Python code to execute
+        libraries_used: Optional comma-separated list of libraries to install (e.g., 'numpy,pandas,plotly')
+
+    Returns:
+        The output of the executed code
+    """
+    # Install any required libraries if specified (skipped when already present)
+    if libraries_used:
+        libs = parse_package_list(libraries_used)
+        install = install_packages(libs)
+        if not install.ok:
+            return f"Error installing {', '.join(libs)}: {install.output}"
+
+    with tracer.span("local_code_interpreter", kind="tool", mode=INTERPRETER_MODE, request_bytes=len(code)) as span:
+        try:
+            if INTERPRETER_MODE == "subprocess":
+                result = run_in_subprocess(code)
+            else:
+                # Execute the code in a warm worker process
+                result = get_worker_pool().execute(code)
+        except Exception as e:
+            span.set(error=type(e).__name__)
+            return f"Error: {str(e)}"
+        output = format_result(result)
+        span.set(response_bytes=len(output), exit_code=result.exit_code, limit=result.limit,
+                 cpu_time=result.cpu_time, max_rss_kb=result.max_rss_kb)
+        return output
+
+def package_installer(package_list: str) -> str:
+    """
+    Install Python packages using pip, skipping any that are already installed.
+
+    Args:
+        package_list: A comma-separated list of packages to install (e.g., 'numpy, pandas, matplotlib').
+
+    Returns:
+        A string with the installation results.
+    """
+    return str(install_packages(parse_package_list(package_list)))
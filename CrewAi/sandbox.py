@@ -0,0 +1,272 @@
+import json
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+
+# Resource-limited execution for the Code Interpreter tool.
+# Programs run in their own process group with CPU-time, address-space and file-size
+# rlimits (POSIX only), a wall-clock deadline and a cap on total output. Output is
+# read as it is produced into a bounded buffer that keeps its head and tail, so a
+# script printing gigabytes costs a fixed amount of memory.
+
+try:
+    import resource
+except ImportError:  # Windows: only the wall-clock and output limits apply
+    resource = None
+
+
+class Limits:
+    """
+    Args:
+        cpu_seconds: CPU time the program may use
+        wall_seconds: Wall-clock time before the program is killed
+        memory_mb: Address-space cap
+        output_bytes: Output kept per stream (half head, half tail)
+        max_output_bytes: Total output per stream after which the program is killed
+        file_size_mb: Largest file the program may write
+    """
+
+    def __init__(self, cpu_seconds: float = 60, wall_seconds: float = 120, memory_mb: int = 2048,
+                 output_bytes: int = 64 * 1024, max_output_bytes: int = 64 * 1024 * 1024, file_size_mb: int = 512):
+        self.cpu_seconds = cpu_seconds
+        self.wall_seconds = wall_seconds
+        self.memory_mb = memory_mb
+        self.output_bytes = output_bytes
+        self.max_output_bytes = max_output_bytes
+        self.file_size_mb = file_size_mb
+
+    @classmethod
+    def from_env(cls, wall_seconds: float = 120) -> "Limits":
+        return cls(
+            cpu_seconds=float(os.getenv("CODE_INTERPRETER_CPU_SECONDS", "60")),
+            wall_seconds=wall_seconds,
+            memory_mb=int(os.getenv("CODE_INTERPRETER_MEMORY_MB", "2048")),
+            output_bytes=int(os.getenv("CODE_INTERPRETER_OUTPUT_BYTES", str(64 * 1024))),
+        )
+
+
+class OutputLimitExceeded(Exception):
+    """Raised by BoundedOutput.write once more than `max_total` bytes were written."""
+
+
+class BoundedOutput:
+    """Keeps the first and last `limit // 2` bytes written and counts the rest.
+
+    Accepts bytes or str, so it can also stand in for sys.stdout. With `max_total`,
+    writing past that many bytes raises OutputLimitExceeded.
+    """
+
+    def __init__(self, limit: int, max_total: int = None):
+        self.limit = limit
+        self.max_total = max_total
+        self._head = bytearray()
+        self._tail = deque()
+        self._tail_size = 0
+        self.total = 0
+
+    def write(self, data) -> int:
+        if isinstance(data, str):
+            length = len(data)
+            data = data.encode(errors="replace")
+        else:
+            length = len(data)
+        self.total += len(data)
+        room = self.limit // 2 - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if data:
+            self._tail.append(bytes(data))
+            self._tail_size += len(data)
+            tail_limit = self.limit - self.limit // 2
+            while self._tail_size - len(self._tail[0]) >= tail_limit:
+                self._tail_size -= len(self._tail.popleft())
+        if self.max_total and self.total > self.max_total:
+            raise OutputLimitExceeded(f"output exceeded {self.max_total} bytes")
+        return length
+
+    def flush(self) -> None:
+        pass
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > self.limit
+
+    def getvalue(self) -> str:
+        head = bytes(self._head).decode(errors="replace")
+        tail = b"".join(self._tail)
+        if not self.truncated:
+            return head + tail.decode(errors="replace")
+        tail = tail[-(self.limit - self.limit // 2):].decode(errors="replace")
+        return f"{head}\n[... {self.total - self.limit} bytes of output omitted ...]\n{tail}"
+
+
+class SandboxResult:
+    def __init__(self, exit_code: int, stdout: str = "", stderr: str = "", duration: float = 0.0,
+                 cpu_time: float = 0.0, max_rss_kb: int = 0, truncated: bool = False, limit: str = None):
+        self.exit_code = exit_code
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+        self.cpu_time = cpu_time
+        self.max_rss_kb = max_rss_kb
+        self.truncated = truncated
+        self.limit = limit  # which limit stopped the program, if any
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0 and self.limit is None
+
+    def summary(self) -> str:
+        status = f"exit code {self.exit_code}"
+        if self.limit:
+            status += f", stopped by the {self.limit} limit"
+        return (f"[{status}; {self.duration:.1f}s wall, {self.cpu_time:.1f}s CPU, "
+                f"{self.max_rss_kb / 1024:.0f}MB peak memory{', output truncated' if self.truncated else ''}]")
+
+    def __repr__(self):
+        return f"SandboxResult(exit_code={self.exit_code}, limit={self.limit}, duration={self.duration:.3f}s)"
+
+
+def _set_rlimit(name: str, value: int) -> None:
+    kind = getattr(resource, name, None)
+    if kind is None:
+        return
+    _, hard = resource.getrlimit(kind)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    try:
+        resource.setrlimit(kind, (value, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def apply_limits(limits: Limits) -> None:
+    """Apply the rlimits in `limits` to the current process."""
+    if resource is None:
+        return
+    if limits.cpu_seconds:
+        _set_rlimit("RLIMIT_CPU", int(limits.cpu_seconds + 0.999))
+    if limits.memory_mb:
+        _set_rlimit("RLIMIT_AS", limits.memory_mb * 1024 * 1024)
+    if limits.file_size_mb:
+        _set_rlimit("RLIMIT_FSIZE", limits.file_size_mb * 1024 * 1024)
+
+
+def _kill(process: subprocess.Popen) -> None:
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _reap(process: subprocess.Popen, deadline: float = None) -> tuple:
+    """Wait for the process, killing it at `deadline`; return (exit code, CPU seconds, peak RSS in KB, killed)."""
+    if not hasattr(os, "wait4"):
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            return process.wait(timeout), 0.0, 0, False
+        except subprocess.TimeoutExpired:
+            _kill(process)
+            return process.wait(), 0.0, 0, True
+
+    killed = False
+    # The program can close its output before exiting; don't wait past the deadline for it
+    while True:
+        pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+        if pid:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            _kill(process)
+            killed = True
+            _, status, usage = os.wait4(process.pid, 0)
+            break
+        time.sleep(0.01)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, usage.ru_utime + usage.ru_stime, usage.ru_maxrss, killed
+
+
+def run_sandboxed(args: list, limits: Limits = None, cwd: str = None) -> SandboxResult:
+    """Run `args` under `limits`, streaming its output into bounded buffers."""
+    limits = limits or Limits()
+    if resource is not None:
+        # Set the rlimits in a small launcher that then execs the program; preexec_fn
+        # isn't safe when the crew is running tools on several threads
+        args = [sys.executable, os.path.abspath(__file__), "--limits", json.dumps(vars(limits)), "--", *args]
+    start = time.monotonic()
+    deadline = start + limits.wall_seconds if limits.wall_seconds else None
+    process = subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        start_new_session=True,  # the whole process group is killed on a limit
+    )
+
+    outputs = {process.stdout: BoundedOutput(limits.output_bytes), process.stderr: BoundedOutput(limits.output_bytes)}
+    limit = None
+    with selectors.DefaultSelector() as selector:
+        for stream in outputs:
+            os.set_blocking(stream.fileno(), False)
+            selector.register(stream, selectors.EVENT_READ)
+        while selector.get_map():
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                limit = "wall-clock"
+                break
+            for key, _ in selector.select(timeout):
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    continue
+                buffer = outputs[key.fileobj]
+                buffer.write(chunk)
+                if limits.max_output_bytes and buffer.total > limits.max_output_bytes:
+                    limit = "output size"
+            if limit:
+                break
+
+    if limit:
+        _kill(process)
+    exit_code, cpu_time, max_rss_kb, killed = _reap(process, deadline)
+    if killed:
+        limit = "wall-clock"
+    for stream in outputs:
+        stream.close()
+
+    if limit is None and resource is not None:
+        # Limits enforced by the kernel show up as the signal that killed the program
+        if exit_code == -signal.SIGXCPU or (limits.cpu_seconds and exit_code == -signal.SIGKILL and cpu_time >= limits.cpu_seconds):
+            limit = "CPU time"
+        elif exit_code == -getattr(signal, "SIGXFSZ", 0):
+            limit = "file size"
+    stdout, stderr = outputs[process.stdout], outputs[process.stderr]
+    if limit is None and exit_code != 0 and "MemoryError" in stderr.getvalue()[-2000:]:
+        limit = "memory"
+
+    return SandboxResult(
+        exit_code=exit_code,
+        stdout=stdout.getvalue(),
+        stderr=stderr.getvalue(),
+        duration=time.monotonic() - start,
+        cpu_time=cpu_time,
+        max_rss_kb=max_rss_kb,
+        truncated=stdout.truncated or stderr.truncated,
+        limit=limit,
+    )
+
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--limits"]:
+    # Launcher: apply the limits to this process, then become the program
+    separator = sys.argv.index("--")
+    apply_limits(Limits(**json.loads(sys.argv[2])))
+    program = sys.argv[separator + 1:]
+    os.execvp(program[0], program)
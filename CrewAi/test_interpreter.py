@@ -1,4 +1,4 @@
-from base import local_code_interpreter
+from interpreter import local_code_interpreter
 
 # Test basic functionality
 test_code = """
@@ -0,0 +1,36 @@
+import os
+import sys
+
+# Checks that CrewAI's model calls go through the process-wide rate limiter, against
+# the mock OpenAI server in benchmarks/ (no API key needed):
+#
+#     python test_rate_limit.py
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from suite import start_mock
+
+RPM = 120
+CALLS = 3
+
+server, port = start_mock("mock_openai.py", "--latency", 0.05, "--rpm", RPM)
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+os.environ["OPENAI_API_KEY"] = "mock-key"
+
+from base import get_llm
+from LLMs.rate_limiter import get_rate_limiter
+
+try:
+    llm = get_llm()
+    print(f"Sending {CALLS} requests through CrewAI's LLM:")
+    for i in range(CALLS):
+        print(f"- {llm.call(f'Rate limiter test {i}')[:40]}")
+
+    stats = get_rate_limiter().stats()[llm.model]
+    print(f"Limiter: {stats}")
+    assert stats["granted"] == CALLS, f"expected {CALLS} requests granted by the limiter, got {stats['granted']}"
+    # The limits come from the mock's x-ratelimit-* headers, which only the limiter's response hook reads
+    assert stats["rpm"] == RPM, f"expected the limiter to learn the server's {RPM} RPM, got {stats['rpm']}"
+    print("CrewAI's model calls go through the shared rate limiter.")
+finally:
+    server.kill()
@@ -0,0 +1,355 @@
+import contextlib
+import importlib
+import json
+import linecache
+import logging
+import os
+import queue
+import re
+import select
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+from sandbox import BoundedOutput, OutputLimitExceeded, SandboxResult
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# A pool of long-lived Python worker processes for the Code Interpreter tool.
+# Each worker imports the heavy libraries once (plotly, pandas, ...) and then
+# executes snippets sent over its stdin pipe, answering on a private copy of
+# its stdout. Messages are length-prefixed JSON in both directions.
+# Each run gets a wall-clock deadline, a CPU-time budget (a per-run soft RLIMIT_CPU)
+# and bounded output buffers; a worker that hits a limit is killed and replaced.
+# Every snippet gets fresh globals, and sys.path, os.environ and the working
+# directory are restored after it. Modules a snippet imports stay loaded, so later
+# snippets find them warm; a worker whose snippet failed is replaced, and every
+# worker is after `max_runs` snippets.
+
+_HEADER = struct.Struct(">I")
+
+logger = logging.getLogger(__name__)
+# Preload failures already logged; replacement workers hit the same ones
+_logged_preload_errors = set()
+
+
+class WorkerCrashed(Exception):
+    """The worker process died or stopped answering."""
+
+
+def _read_exact(fd: int, size: int, deadline: float = None) -> bytes:
+    data = b""
+    while len(data) < size:
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                raise TimeoutError
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            raise WorkerCrashed("worker closed its pipe")
+        data += chunk
+    return data
+
+
+def _read_message(fd: int, deadline: float = None) -> dict:
+    (size,) = _HEADER.unpack(_read_exact(fd, _HEADER.size, deadline))
+    return json.loads(_read_exact(fd, size, deadline))
+
+
+def _write_message(stream, message: dict) -> None:
+    payload = json.dumps(message).encode()
+    stream.write(_HEADER.pack(len(payload)) + payload)
+    stream.flush()
+
+
+class Worker:
+    """One pre-warmed interpreter process."""
+
+    def __init__(self, preload=(), memory_limit_mb: int = None):
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker"]
+        if memory_limit_mb:
+            cmd += ["--memory-limit-mb", str(memory_limit_mb)]
+        cmd += list(preload)
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.runs = 0
+        # Set when a run may have left state behind; the pool replaces the worker
+        self.dirty = False
+        # The worker says hello once its preloads are imported
+        hello = _read_message(self.process.stdout.fileno())
+        for module, error in hello.get("preload_errors", {}).items():
+            if (module, error) in _logged_preload_errors:
+                continue
+            _logged_preload_errors.add((module, error))
+            logger.warning("Code interpreter worker could not preload %s: %s", module, error)
+
+    def execute(self, code: str, timeout: float = None, cpu_seconds: float = None, output_bytes: int = None,
+                max_output_bytes: int = None) -> SandboxResult:
+        deadline = time.monotonic() + timeout if timeout else None
+        self.runs += 1
+        try:
+            _write_message(self.process.stdin, {
+                "code": code,
+                "cpu_seconds": cpu_seconds,
+                "output_bytes": output_bytes,
+                "max_output_bytes": max_output_bytes,
+            })
+            reply = _read_message(self.process.stdout.fileno(), deadline)
+        except (BrokenPipeError, struct.error, ValueError) as e:
+            raise WorkerCrashed(str(e))
+        self.dirty = reply.pop("recycle", False)
+        return SandboxResult(**reply)
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def kill(self) -> None:
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+
+
+class WorkerPool:
+    """Pool of warm interpreter workers.
+
+    Args:
+        size: Number of worker processes
+        preload: Modules each worker imports at startup (e.g. ['pandas', 'plotly'])
+        timeout: Per-execution wall-clock limit in seconds
+        memory_limit_mb: Address-space cap for each worker (Linux/macOS only)
+        max_runs: Recycle a worker after this many executions
+        cpu_seconds: Per-execution CPU-time limit
+        output_bytes: Output kept per stream and execution (half head, half tail)
+        max_output_bytes: Output per stream after which an execution is stopped
+    """
+
+    def __init__(self, size: int = 2, preload=(), timeout: float = 60, memory_limit_mb: int = 2048, max_runs: int = 50,
+                 cpu_seconds: float = None, output_bytes: int = 64 * 1024, max_output_bytes: int = 64 * 1024 * 1024):
+        self.size = size
+        self.preload = tuple(preload)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_runs = max_runs
+        self.cpu_seconds = cpu_seconds
+        self.output_bytes = output_bytes
+        self.max_output_bytes = max_output_bytes
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = 0
+        self._closed = False
+
+    def start(self) -> "WorkerPool":
+        """Start (pre-warm) all workers up front instead of on first use."""
+        with self._lock:
+            missing = self.size - self._started
+            self._started = self.size
+        for _ in range(missing):
+            self._idle.put(self._spawn())
+        return self
+
+    def _spawn(self) -> Worker:
+        return Worker(self.preload, self.memory_limit_mb)
+
+    def _acquire(self) -> Worker:
+        with self._lock:
+            grow = self._idle.empty() and self._started < self.size
+            if grow:
+                self._started += 1
+        if grow:
+            try:
+                return self._spawn()
+            except Exception:
+                with self._lock:
+                    self._started -= 1
+                raise
+        return self._idle.get()
+
+    def _release(self, worker: Worker) -> None:
+        if self._closed:
+            worker.kill()
+            return
+        if not worker.alive() or worker.dirty or worker.runs >= self.max_runs:
+            worker.kill()
+            # Warm the replacement in the background so the caller gets its result now
+            threading.Thread(target=self._replace, daemon=True).start()
+            return
+        self._idle.put(worker)
+
+    def _replace(self) -> None:
+        try:
+            worker = self._spawn()
+        except Exception:
+            # Let the next _acquire try again instead of losing the slot
+            with self._lock:
+                self._started -= 1
+            return
+        if self._closed:
+            worker.kill()
+        else:
+            self._idle.put(worker)
+
+    def execute(self, code: str, timeout: float = None) -> SandboxResult:
+        """Run `code` in a warm worker, recycling the worker if it hits a limit or crashes."""
+        timeout = timeout or self.timeout
+        worker = self._acquire()
+        start = time.monotonic()
+        try:
+            return worker.execute(code, timeout, self.cpu_seconds, self.output_bytes, self.max_output_bytes)
+        except TimeoutError:
+            worker.kill()
+            return SandboxResult(-9, stderr=f"Execution timed out after {timeout}s",
+                                 duration=time.monotonic() - start, limit="wall-clock")
+        except WorkerCrashed as e:
+            worker.kill()
+            exit_code = worker.process.returncode
+            limit = "CPU time" if resource is not None and exit_code in (-signal.SIGXCPU, -signal.SIGKILL) else None
+            return SandboxResult(exit_code, stderr=f"Worker crashed (exit code {exit_code}): {e}",
+                                 duration=time.monotonic() - start, limit=limit)
+        finally:
+            self._release(worker)
+
+    def close(self) -> None:
+        self._closed = True
+        while not self._idle.empty():
+            self._idle.get_nowait().kill()
+
+
+def _cpu_time() -> float:
+    if resource is None:
+        return time.process_time()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the process's peak RSS (Linux), so the next reading covers one run."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kb(reset: bool) -> int:
+    """Peak RSS since `_reset_peak_rss`, or over the worker's whole life if it couldn't reset."""
+    if reset:
+        try:
+            with open("/proc/self/status") as f:
+                match = re.search(r"VmHWM:\s+(\d+)", f.read())
+            if match:
+                return int(match.group(1))
+        except OSError:
+            pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else 0
+
+
+def _print_snippet_exception(error: BaseException) -> None:
+    """Print a traceback of the snippet's frames only, as a python process running it would."""
+    tb = error.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename != "<code>":
+        tb = tb.tb_next
+    traceback.print_exception(type(error), error, tb)
+
+
+def _worker_main(argv) -> None:
+    """Entry point of a worker process."""
+    memory_limit_mb = None
+    if argv[:1] == ["--memory-limit-mb"]:
+        memory_limit_mb = int(argv[1])
+        argv = argv[2:]
+
+    if memory_limit_mb and resource is not None:
+        try:
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+
+    preload_errors = {}
+    for module in argv:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            # Reported to the pool, which logs it; the worker still starts without the module
+            preload_errors[module] = f"{type(e).__name__}: {e}"
+
+    # Keep the real stdout for the protocol; stray writes to fd 1 go to stderr
+    protocol_out = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    protocol_in = sys.stdin.buffer
+    cwd = os.getcwd()
+    path = list(sys.path)
+    environ = dict(os.environ)
+
+    _write_message(protocol_out, {"ready": True, "preload_errors": preload_errors})
+    while True:
+        header = protocol_in.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+        (size,) = _HEADER.unpack(header)
+        request = json.loads(protocol_in.read(size))
+
+        # Pick up packages installed since the worker started
+        importlib.invalidate_caches()
+        output_bytes = request.get("output_bytes") or 64 * 1024
+        stdout = BoundedOutput(output_bytes, request.get("max_output_bytes"))
+        stderr = BoundedOutput(output_bytes, request.get("max_output_bytes"))
+        exit_code = 0
+        limit = None
+        # Source for the snippet's traceback lines
+        linecache.cache["<code>"] = (len(request["code"]), None, request["code"].splitlines(True), "<code>")
+        rss_reset = _reset_peak_rss()
+        start = time.monotonic()
+        cpu_start = _cpu_time()
+        if request.get("cpu_seconds") and resource is not None:
+            # RLIMIT_CPU counts the worker's whole life, so move the soft limit past what it used so far
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            soft = int(cpu_start + request["cpu_seconds"] + 1)
+            if hard == resource.RLIM_INFINITY or soft <= hard:
+                resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                exec(compile(request["code"], "<code>", "exec"), {"__name__": "__main__"})
+            except SystemExit as e:
+                exit_code = 0 if e.code in (None, 0) else e.code if isinstance(e.code, int) else 1
+            except OutputLimitExceeded:
+                exit_code, limit = 1, "output size"
+            except BaseException as e:
+                exit_code = 1
+                _print_snippet_exception(e)
+        os.chdir(cwd)
+        sys.path[:] = path
+        if os.environ != environ:
+            os.environ.clear()
+            os.environ.update(environ)
+        _write_message(protocol_out, {
+            "exit_code": exit_code,
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+            "duration": time.monotonic() - start,
+            "cpu_time": _cpu_time() - cpu_start,
+            "max_rss_kb": _peak_rss_kb(rss_reset),
+            "truncated": stdout.truncated or stderr.truncated,
+            "limit": limit or ("memory" if exit_code and "MemoryError" in stderr.getvalue()[-2000:] else None),
+            # A failed snippet may have left state behind for the next one
+            "recycle": exit_code != 0,
+        })
+
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--worker"]:
+    _worker_main(sys.argv[2:])
@@ -1,38 +1,131 @@
 import os
+import sys
 from openai import OpenAI
+from openai.types.chat import ChatCompletion
 
-# Initialize the OpenAI client
-# Make sure to set your API key as an environment variable
-client = OpenAI(
-    # This is the recommended way to store API keys
-    api_key=os.environ.get("OPENAI_API_KEY")
-)
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def generate_text_completion():
+from LLMs.rate_limiter import MAX_RETRIES, rate_limited_http_client
+from LLMs.response_cache import get_default_cache
+from LLMs.speech import synthesize_long_text
+from LLMs.streaming import StreamMetrics, TextStream
+from LLMs.transcription import transcribe_long_audio
+from tools.tracing import payload_size, tracer, usage_attributes
+
+# The OpenAI client is created on first use rather than at import time.
+# For async code and concurrent fan-out (complete_many) see async_client.py.
+_client = None
+
+def get_client() -> OpenAI:
+    """
+    Return the shared OpenAI client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        # Make sure to set your API key as an environment variable
+        _client = OpenAI(
+            # This is the recommended way to store API keys
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            # Requests wait their turn in the process-wide rate limiter (see rate_limiter.py)
+            http_client=rate_limited_http_client(),
+            max_retries=MAX_RETRIES,
+        )
+    return _client
+
+def create_chat_completion(**request) -> ChatCompletion:
+    """
+    chat.completions.create through the response cache.
+    Caching is off unless LLM_CACHE_MODE is set (read_write, record or replay).
+    """
+    cache = get_default_cache()
+    with tracer.span("chat.completions", kind="model", model=request.get("model"),
+                     request_bytes=payload_size(request.get("messages"))) as span:
+        if cache.mode == "off":
+            response = get_client().chat.completions.create(**request)
+        else:
+            fresh = False
+
+            def create():
+                nonlocal fresh
+                fresh = True
+                return get_client().chat.completions.create(**request).model_dump()
+
+            response = ChatCompletion.model_validate(cache.get_or_create_sync(request, create))
+            span.set(cache_hits=int(not fresh))
+        span.set(response_bytes=payload_size([choice.message for choice in response.choices]),
+                 **usage_attributes(response.usage))
+        return response
+
+def _text_messages(prompt, system_prompt):
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+def generate_text_completion(
+    prompt="Write a short poem about technology.",
+    model="gpt-3.5-turbo",  # You can change this to gpt-4 or other models
+    system_prompt="You are a helpful assistant.",
+    max_tokens=150,
+    temperature=0.7,
+    stream=False,
+):
     """
     Generate a text completion using the GPT model.
+    With stream=True the text is printed as it arrives, followed by its latency metrics.
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",  # You can change this to gpt-4 or other models
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": "Write a short poem about technology."}
-            ],
-            max_tokens=150,
-            temperature=0.7
+        if stream:
+            print("Text Completion Response:")
+            completion = stream_text_completion(prompt, model, system_prompt, max_tokens, temperature)
+            for text in completion:
+                print(text, end="", flush=True)
+            print()
+            print(f"Latency: {completion.metrics}")
+            return
+
+        response = create_chat_completion(
+            model=model,
+            messages=_text_messages(prompt, system_prompt),
+            max_tokens=max_tokens,
+            temperature=temperature
         )
         print("Text Completion Response:")
         print(response.choices[0].message.content)
     except Exception as e:
         print(f"An error occurred in text completion: {e}")
 
+def stream_text_completion(
+    prompt="Write a short poem about technology.",
+    model="gpt-3.5-turbo",
+    system_prompt="You are a helpful assistant.",
+    max_tokens=150,
+    temperature=0.7,
+) -> TextStream:
+    """
+    Stream a text completion as an iterator of text deltas.
+    The returned stream's `metrics` hold time-to-first-token, tokens per second
+    and total latency once iteration has finished.
+    """
+    metrics = StreamMetrics()
+    stream = get_client().chat.completions.create(
+        model=model,
+        messages=_text_messages(prompt, system_prompt),
+        max_tokens=max_tokens,
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    return TextStream(stream, metrics)
+
 def generate_image():
     """
     Generate an image using DALL-E.
     """
     try:
-        response = client.images.generate(
+        response = get_client().images.generate(
             model="dall-e-3",
             prompt="A futuristic cityscape with flying cars",
             n=1,  # Number of images to generate
@@ -45,47 +138,48 @@ def generate_image():
     except Exception as e:
         print(f"An error occurred in image generation: {e}")
 
-def transcribe_audio():
+def transcribe_audio(file_path="path/to/your/audio/file.mp3", max_concurrency=4):
     """
     Transcribe an audio file using Whisper.
-    Note: Replace 'path/to/your/audio/file.mp3' with an actual audio file path.
+    Large files are split into segments that are transcribed concurrently;
+    results are cached by file content, so a file is only transcribed once.
+    Returns the transcript as {"text": ..., "segments": [{"start", "end", "text"}, ...]}.
     """
     try:
-        with open("path/to/your/audio/file.mp3", "rb") as audio_file:
-            transcription = client.audio.transcriptions.create(
-                model="whisper-1", 
-                file=audio_file
-            )
+        transcription = transcribe_long_audio(get_client(), file_path, max_concurrency=max_concurrency)
         
         print("Audio Transcription:")
-        print(transcription.text)
+        print(transcription["text"])
+        return transcription
     except Exception as e:
         print(f"An error occurred in audio transcription: {e}")
 
 
-def text_to_speech(text, file_path):
-    # Ensure the directory exists
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    
+def text_to_speech(text, file_path, max_concurrency=4):
+    """
+    Convert text of any length to speech and save it as an mp3.
+    Long texts are split at sentence boundaries and the chunks synthesized concurrently.
+    Returns the path of the file written.
+    """
     # Add .mp3 extension if not present
     if not file_path.endswith('.mp3'):
         file_path = f"{file_path}.mp3"
 
-    response = client.audio.speech.create(
+    # Ensure the directory exists
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    return synthesize_long_text(
+        get_client(),
+        text,
+        file_path,
+        max_concurrency=max_concurrency,
         model="tts-1",
         voice="nova",  # Alloy has a more professional, podcast-like voice
-        input=text,
         speed=1.12,  # Slightly slower for better clarity
         response_format="mp3",  # Ensure high quality audio
     )
-    
-    
-    # Create a temporary path for the main audio
-    temp_main_audio_path = f"{file_path}.mp3"
-    
-    # Save the main audio to the temporary path
-    response.stream_to_file(temp_main_audio_path)
-    return file_path
 
 
 def main():
@@ -95,8 +189,9 @@ def main():
     # Uncomment the functions you want to test
     
     # generate_text_completion()
+    # generate_text_completion(stream=True)  # Prints tokens as they arrive plus latency metrics
     # generate_image()  # Requires DALL-E access
-    # transcribe_audio()  # Requires an audio file
+    # transcribe_audio("path/to/your/audio/file.mp3")  # Requires an audio file
     # text_to_speech("Hello, how are you?", "test.mp3")
 
 if __name__ == "__main__":    
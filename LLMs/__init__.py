@@ -0,0 +1,2 @@
+# This file makes the 'LLMs' directory a Python package
+# Allows importing modules from this directory
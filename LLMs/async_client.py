@@ -0,0 +1,186 @@
+import asyncio
+import os
+from typing import Iterable, List, Optional
+
+import httpx
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+
+from LLMs.rate_limiter import BATCH, MAX_RETRIES, async_event_hooks, request_priority
+from LLMs.response_cache import get_default_cache
+from LLMs.streaming import AsyncTextStream, StreamMetrics
+from tools.loop_resources import close_at_loop_shutdown, close_on_loop
+from tools.tracing import payload_size, tracer, usage_attributes
+
+try:
+    # aiohttp-backed httpx client (pip install httpx-aiohttp); its pool is much cheaper
+    # per request than httpx's own under hundreds of concurrent requests
+    from httpx_aiohttp import HttpxAiohttpClient as PooledAsyncClient
+except ImportError:
+    PooledAsyncClient = httpx.AsyncClient
+
+# Async facade over the OpenAI API. A single AsyncOpenAI client, backed by one tuned
+# httpx connection pool, is created lazily on first use and shared by every helper.
+# Set OPENAI_BASE_URL to point the client at a proxy or a local mock server.
+#
+# Requires: pip install openai httpx (optionally httpx-aiohttp for the faster transport)
+
+MAX_CONNECTIONS = 200
+MAX_KEEPALIVE_CONNECTIONS = 100
+KEEPALIVE_EXPIRY = 30
+REQUEST_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+_client = None
+_client_loop = None
+_client_closer = None
+
+
+def get_async_client() -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client, creating it on first use.
+
+    The connection pool belongs to the event loop it was created on, so a new
+    client is created if the caller is running on a different loop. Each client is
+    closed when its loop shuts down (or when replaced, if its loop still runs elsewhere).
+    """
+    global _client, _client_loop, _client_closer
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        if _client is not None:
+            close_on_loop(_client.close, _client_loop)
+        http_client = PooledAsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            timeout=REQUEST_TIMEOUT,
+            # Requests wait their turn in the process-wide rate limiter (see rate_limiter.py)
+            event_hooks=async_event_hooks(),
+        )
+        _client = AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            base_url=os.environ.get("OPENAI_BASE_URL"),
+            http_client=http_client,
+            max_retries=MAX_RETRIES,
+        )
+        _client_loop = loop
+        _client_closer = close_at_loop_shutdown(_client.close)
+    return _client
+
+
+async def close_async_client() -> None:
+    """Close the shared client and its connection pool."""
+    global _client, _client_loop, _client_closer
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _client_loop = None
+    _client_closer = None
+
+
+def _messages(prompt: str, system_prompt: Optional[str]) -> list:
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+async def create_chat_completion(**request) -> ChatCompletion:
+    """chat.completions.create through the response cache (see response_cache.py for the modes)."""
+    cache = get_default_cache()
+    with tracer.span("chat.completions", kind="model", model=request.get("model"),
+                     request_bytes=payload_size(request.get("messages"))) as span:
+        if cache.mode == "off":
+            response = await get_async_client().chat.completions.create(**request)
+        else:
+            fresh = False
+
+            async def create():
+                nonlocal fresh
+                fresh = True
+                response = await get_async_client().chat.completions.create(**request)
+                return response.model_dump()
+
+            response = ChatCompletion.model_validate(await cache.get_or_create(request, create))
+            span.set(cache_hits=int(not fresh))
+        span.set(response_bytes=payload_size([choice.message for choice in response.choices]),
+                 **usage_attributes(response.usage))
+        return response
+
+
+async def complete(
+    prompt: str,
+    model: str = DEFAULT_MODEL,
+    system_prompt: Optional[str] = "You are a helpful assistant.",
+    max_tokens: int = 150,
+    temperature: float = 0.7,
+    **options,
+) -> str:
+    """Return the text of a single chat completion."""
+    response = await create_chat_completion(
+        model=model,
+        messages=_messages(prompt, system_prompt),
+        max_tokens=max_tokens,
+        temperature=temperature,
+        **options,
+    )
+    return response.choices[0].message.content
+
+
+async def stream_complete(
+    prompt: str,
+    model: str = DEFAULT_MODEL,
+    system_prompt: Optional[str] = "You are a helpful assistant.",
+    max_tokens: int = 150,
+    temperature: float = 0.7,
+    **options,
+) -> AsyncTextStream:
+    """Stream a chat completion as an async iterator of text deltas.
+
+    The returned stream's `metrics` hold time-to-first-token, tokens per second
+    and total latency once iteration has finished.
+    """
+    metrics = StreamMetrics()
+    stream = await get_async_client().chat.completions.create(
+        model=model,
+        messages=_messages(prompt, system_prompt),
+        max_tokens=max_tokens,
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True},
+        **options,
+    )
+    return AsyncTextStream(stream, metrics)
+
+
+async def complete_many(prompts: Iterable[str], max_concurrency: int = 32, priority: int = BATCH, **options) -> List:
+    """Complete many prompts concurrently, returning results in prompt order.
+
+    Failed prompts return their exception in place of the text, so one error
+    doesn't discard the rest of the batch. The requests are scheduled at `priority`,
+    behind interactive requests by default.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(prompt: str):
+        async with semaphore:
+            with request_priority(priority):
+                return await complete(prompt, **options)
+
+    return await asyncio.gather(*(run_one(prompt) for prompt in prompts), return_exceptions=True)
+
+
+async def generate_image(prompt: str, model: str = "dall-e-3", size: str = "1024x1024") -> str:
+    """Generate an image and return its URL."""
+    response = await get_async_client().images.generate(model=model, prompt=prompt, n=1, size=size)
+    return response.data[0].url
+
+
+async def transcribe(file_path: str, model: str = "whisper-1") -> str:
+    """Transcribe an audio file and return the text."""
+    with open(file_path, "rb") as audio_file:
+        transcription = await get_async_client().audio.transcriptions.create(model=model, file=audio_file)
+    return transcription.text
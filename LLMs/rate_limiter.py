@@ -0,0 +1,371 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import httpx
+
+# Process-wide scheduler for OpenAI requests. Every client in the repo (Openai.py,
+# async_client.py, the autogen model clients, and CrewAI's LLM through the
+# interceptor in CrewAi/base.py) sends its requests through the httpx hooks below,
+# so they share one view of the rate limits:
+#   - per model, a requests-per-minute and a tokens-per-minute token bucket; a request
+#     waits until both have room for it (its prompt estimate plus max_tokens)
+#   - waiting requests go in priority order: INTERACTIVE before BATCH, then first come
+#     first served (`with request_priority(BATCH): ...`)
+#   - the x-ratelimit-* headers of every response set the bucket sizes and levels
+#   - a 429 pauses the model for its retry-after (or an exponential backoff with full
+#     jitter after repeated 429s), so queued requests and the SDK's own retries don't
+#     all hit the API again at the same moment
+#
+# Until the first response reports the real limits the buckets start at
+# OPENAI_RATE_LIMIT_RPM / OPENAI_RATE_LIMIT_TPM.
+
+INTERACTIVE = 0
+BATCH = 10
+
+DEFAULT_RPM = int(os.getenv("OPENAI_RATE_LIMIT_RPM", "500"))
+DEFAULT_TPM = int(os.getenv("OPENAI_RATE_LIMIT_TPM", "200000"))
+
+# Completion tokens counted for requests that don't set max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
+# Retries the SDK makes on 429s and 5xx; the scheduler spaces them out
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+_priority = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Schedule the requests made inside the block at `priority` (lower goes first)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a rate-limit reset value such as "1s", "6m0s" or "250ms"."""
+    if not value:
+        return None
+    parts = _DURATION.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(number) * _UNITS[unit] for number, unit in parts)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's retry-after."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class TokenBucket:
+    """Continuously refilled bucket holding up to `per_minute` units."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (a request larger than the bucket waits for a full one)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) * 60 / self.capacity
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def update(self, limit: Optional[float], remaining: Optional[float], now: float) -> None:
+        """Adopt the limit reported by the server, and its remaining count when that is lower.
+
+        The server's count lags the requests still in flight, so it only ever lowers the level.
+        """
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+        self.level = min(self.level, self.capacity, float(remaining) if remaining is not None else self.capacity)
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "wake")
+
+    def __init__(self, priority: int, seq: int, tokens: int, wake):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.wake = wake
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _ModelState:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.paused_until = 0.0
+        self.strikes = 0  # consecutive 429s
+        self.waiters = []
+        self.granted = 0
+        self.rate_limited = 0
+
+
+class RateLimiter:
+    """Token-bucket scheduler keyed by model, usable from threads and event loops alike."""
+
+    def __init__(self, rpm: float = DEFAULT_RPM, tpm: float = DEFAULT_TPM):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._lock = threading.Lock()
+        self._models = {}
+        self._seq = itertools.count()
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            state = self._models[model] = _ModelState(self.rpm, self.tpm)
+        return state
+
+    def _enqueue(self, model: str, tokens: int, priority: Optional[int], wake) -> _Waiter:
+        waiter = _Waiter(_priority.get() if priority is None else priority, next(self._seq), tokens, wake)
+        with self._lock:
+            state = self._state(model)
+            heapq.heappush(state.waiters, waiter)
+        return waiter
+
+    def _try_acquire(self, model: str, waiter: _Waiter) -> Optional[float]:
+        """0 if `waiter` got its tokens, seconds to wait if it is first in line, None if it isn't."""
+        with self._lock:
+            state = self._models[model]
+            if state.waiters[0] is not waiter:
+                return None
+            now = time.monotonic()
+            wait = max(state.paused_until - now, state.requests.wait_time(1, now),
+                       state.tokens.wait_time(waiter.tokens, now))
+            if wait > 0:
+                return wait
+            heapq.heappop(state.waiters)
+            state.requests.take(1)
+            state.tokens.take(waiter.tokens)
+            state.granted += 1
+            following = state.waiters[0] if state.waiters else None
+        # The next request in line may fit in what is left
+        if following is not None:
+            following.wake()
+        return 0.0
+
+    def _remove(self, model: str, waiter: _Waiter) -> None:
+        with self._lock:
+            state = self._models[model]
+            if waiter in state.waiters:
+                state.waiters.remove(waiter)
+                heapq.heapify(state.waiters)
+            following = state.waiters[0] if state.waiters else None
+        if following is not None:
+            following.wake()
+
+    async def acquire(self, model: str, tokens: int, priority: Optional[int] = None) -> None:
+        """Wait until `model` has room for one request of `tokens` tokens, then take it."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # the waiter's loop has closed
+                pass
+
+        waiter = self._enqueue(model, tokens, priority, wake)
+        try:
+            while True:
+                wait = self._try_acquire(model, waiter)
+                if wait == 0:
+                    return
+                event.clear()
+                try:
+                    # Not first in line: woken when the requests ahead are granted
+                    await asyncio.wait_for(event.wait(), wait if wait is not None else 1.0)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._remove(model, waiter)
+            raise
+
+    def acquire_sync(self, model: str, tokens: int, priority: Optional[int] = None) -> None:
+        """Blocking version of `acquire` for threads."""
+        event = threading.Event()
+        waiter = self._enqueue(model, tokens, priority, event.set)
+        try:
+            while True:
+                wait = self._try_acquire(model, waiter)
+                if wait == 0:
+                    return
+                event.wait(wait if wait is not None else 1.0)
+                event.clear()
+        except BaseException:
+            self._remove(model, waiter)
+            raise
+
+    def _update_buckets(self, state: _ModelState, headers, now: float) -> None:
+        def number(name):
+            try:
+                return float(headers[name])
+            except (KeyError, TypeError, ValueError):
+                return None
+
+        state.requests.update(number("x-ratelimit-limit-requests"), number("x-ratelimit-remaining-requests"), now)
+        state.tokens.update(number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens"), now)
+
+    def update(self, model: str, headers) -> None:
+        """Adjust `model`'s buckets to the x-ratelimit-* headers of a response."""
+        with self._lock:
+            state = self._state(model)
+            self._update_buckets(state, headers, time.monotonic())
+            state.strikes = 0
+
+    def on_rate_limited(self, model: str, headers) -> float:
+        """Pause `model` after a 429; returns the pause in seconds."""
+        retry_after = None
+        if headers.get("retry-after-ms"):
+            retry_after = parse_duration(headers["retry-after-ms"] + "ms")
+        elif headers.get("retry-after"):
+            retry_after = parse_duration(headers["retry-after"])
+        retry_after = retry_after or max(
+            parse_duration(headers.get("x-ratelimit-reset-requests")) or 0.0,
+            parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0.0,
+        )
+        with self._lock:
+            state = self._state(model)
+            now = time.monotonic()
+            self._update_buckets(state, headers, now)
+            state.rate_limited += 1
+            if now < state.paused_until:
+                # Requests already in flight when the pause began; only the server's wait counts
+                state.paused_until = max(state.paused_until, now + retry_after)
+            else:
+                state.paused_until = now + backoff_delay(state.strikes, retry_after)
+                state.strikes += 1
+            return state.paused_until - now
+
+    def stats(self) -> dict:
+        """Per-model limits, current levels, queue length and counters."""
+        with self._lock:
+            return {
+                model: {
+                    "rpm": state.requests.capacity,
+                    "tpm": state.tokens.capacity,
+                    "requests_available": state.requests.level,
+                    "tokens_available": state.tokens.level,
+                    "queued": len(state.waiters),
+                    "granted": state.granted,
+                    "rate_limited": state.rate_limited,
+                }
+                for model, state in self._models.items()
+            }
+
+
+_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    return _limiter
+
+
+def estimate_tokens(body: dict) -> int:
+    """Tokens a request counts against the TPM limit: ~4 characters per prompt token plus max_tokens."""
+    prompt = 0
+    for message in body.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        prompt += len(str(content or "")) // 4 + 4
+    if body.get("input"):
+        prompt += len(str(body["input"])) // 4
+    completion = body.get("max_completion_tokens") or body.get("max_tokens")
+    if completion is None:
+        completion = DEFAULT_COMPLETION_TOKENS if "messages" in body else 0
+    return prompt + completion
+
+
+def _request_key(request: httpx.Request) -> tuple:
+    """(model, tokens) of an API request; requests without a JSON body are keyed by endpoint."""
+    try:
+        body = json.loads(request.content)
+    except (ValueError, UnicodeDecodeError, httpx.RequestNotRead):
+        return request.url.path, 0
+    if not isinstance(body, dict):
+        return request.url.path, 0
+    return body.get("model") or request.url.path, estimate_tokens(body)
+
+
+def event_hooks(limiter: RateLimiter = None) -> dict:
+    """httpx event hooks routing a sync client's requests through `limiter`."""
+    limiter = limiter or _limiter
+
+    def on_request(request: httpx.Request) -> None:
+        model, tokens = _request_key(request)
+        limiter.acquire_sync(model, tokens)
+
+    def on_response(response: httpx.Response) -> None:
+        model, _ = _request_key(response.request)
+        if response.status_code == 429:
+            limiter.on_rate_limited(model, response.headers)
+        elif "x-ratelimit-limit-requests" in response.headers:
+            limiter.update(model, response.headers)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def async_event_hooks(limiter: RateLimiter = None) -> dict:
+    """httpx event hooks routing an async client's requests through `limiter`."""
+    limiter = limiter or _limiter
+
+    async def on_request(request: httpx.Request) -> None:
+        model, tokens = _request_key(request)
+        await limiter.acquire(model, tokens)
+
+    async def on_response(response: httpx.Response) -> None:
+        model, _ = _request_key(response.request)
+        if response.status_code == 429:
+            limiter.on_rate_limited(model, response.headers)
+        elif "x-ratelimit-limit-requests" in response.headers:
+            limiter.update(model, response.headers)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def rate_limited_http_client(**kwargs) -> httpx.Client:
+    """The OpenAI SDK's default sync httpx client, with the shared scheduler's hooks."""
+    from openai import DefaultHttpxClient
+
+    return DefaultHttpxClient(event_hooks=event_hooks(), **kwargs)
+
+
+def rate_limited_async_http_client(**kwargs) -> httpx.AsyncClient:
+    """The OpenAI SDK's default async httpx client, with the shared scheduler's hooks."""
+    from openai import DefaultAsyncHttpxClient
+
+    return DefaultAsyncHttpxClient(event_hooks=async_event_hooks(), **kwargs)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from concurrent.futures import Future
+
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.cache import DiskCache, MemoryCache, TieredCache
+
+# Response cache for chat completions. Requests are keyed by a hash of their canonical
+# JSON form (model, messages and every parameter), responses are kept in a bounded LRU
+# plus an optional SQLite file, and concurrent identical requests share one API call.
+#
+# Modes:
+#   off         - always call the API
+#   read_write  - serve hits from the cache, call the API and store on a miss
+#   record      - always call the API and store the response (refreshes the cache)
+#   replay      - only serve from the cache; a miss raises CacheMiss (fully offline runs)
+#
+# Caching returns the same answer for the same request, so enable it for deterministic
+# (temperature 0) workloads, test suites and offline replay rather than creative sampling.
+
+MODES = ("off", "read_write", "record", "replay")
+
+
+class CacheMiss(KeyError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def request_key(request: dict) -> str:
+    """Canonical hash of a request: key order and whitespace don't matter."""
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, mode: str = "read_write", path: str = None, max_bytes: int = 64 * 1024 * 1024, ttl: float = 30 * 24 * 3600):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}, expected one of {MODES}")
+        self.mode = mode
+        self.store = TieredCache(MemoryCache(max_bytes=max_bytes, ttl=ttl), DiskCache(path, ttl=ttl) if path else None)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Configure from LLM_CACHE_MODE (default: off) and LLM_CACHE_PATH (SQLite file)."""
+        return cls(mode=os.getenv("LLM_CACHE_MODE", "off"), path=os.getenv("LLM_CACHE_PATH"))
+
+    async def get_or_create(self, request: dict, create):
+        """Return the cached response for `request`, awaiting `create()` to produce one if needed.
+
+        `create` must return a JSON-serializable value (e.g. `response.model_dump()`).
+        """
+        if self.mode == "off":
+            return await create()
+        key = request_key(request)
+        if self.mode == "record":
+            value = await create()
+            await self.store.set(key, value)
+            return value
+        if self.mode == "replay":
+            value = await self.store.get(key)
+            if value is None:
+                raise CacheMiss(key)
+            return value
+        return await self.store.get_or_fetch(key, create)
+
+    def get_or_create_sync(self, request: dict, create):
+        """Blocking version of `get_or_create` for sync clients; `create` is a plain callable."""
+        if self.mode == "off":
+            return create()
+        key = request_key(request)
+        if self.mode == "record":
+            value = create()
+            self.store.set_sync(key, value)
+            return value
+        value = self.store.get_sync(key)
+        if value is not None:
+            return value
+        if self.mode == "replay":
+            raise CacheMiss(key)
+
+        # Threads asking for the same key while it is being created wait for that call
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = Future()
+        if not owner:
+            self.store.counters["merged"] += 1
+            return pending.result()
+
+        try:
+            value = create()
+            self.store.set_sync(key, value)
+            pending.set_result(value)
+            return value
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+
+_default_cache = None
+
+
+def get_default_cache() -> ResponseCache:
+    """Process-wide cache shared by the LLM helpers, configured from the environment."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache.from_env()
+    return _default_cache
@@ -0,0 +1,88 @@
+import hashlib
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+# Chunked text-to-speech for long inputs. The text is split at sentence boundaries
+# into chunks below the API's input limit, the chunks are synthesized concurrently
+# and streamed to disk, then appended to the output file in order. Synthesized
+# chunks are kept in a cache directory keyed by a hash of their content, so
+# repeated chunks (intros, disclaimers, re-runs) are only synthesized once.
+
+MAX_INPUT_CHARS = 4096
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "llm_snippets", "tts"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def split_text(text: str, max_chars: int = MAX_INPUT_CHARS) -> list:
+    """Split text into chunks of at most `max_chars`, breaking at sentence ends where possible."""
+    pieces = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        while len(sentence) > max_chars:
+            # Sentence too long on its own: break at the last space that fits, or hard-split
+            cut = sentence.rfind(" ", 0, max_chars + 1)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            pieces.append(sentence)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current} {piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _cache_path(text: str, options: dict) -> str:
+    key = "\0".join([text] + [f"{name}={options[name]}" for name in sorted(options)])
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.{options['response_format']}")
+
+
+def _synthesize(client, text: str, options: dict) -> str:
+    """Synthesize one chunk into the cache (streaming it to disk) and return its path."""
+    path = _cache_path(text, options)
+    if os.path.exists(path):
+        return path
+
+    temp_path = f"{path}.{os.getpid()}.{id(text)}.part"
+    try:
+        with client.audio.speech.with_streaming_response.create(input=text, **options) as response:
+            response.stream_to_file(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        # Left behind only if the request or the download failed
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    return path
+
+
+def synthesize_long_text(client, text: str, file_path: str, max_concurrency: int = 4, max_chars: int = MAX_INPUT_CHARS, **options) -> str:
+    """Synthesize `text` of any length into `file_path` and return the path written."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    chunks = split_text(text, max_chars)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        # Identical chunks are only synthesized once
+        futures = {}
+        for chunk in chunks:
+            if chunk not in futures:
+                futures[chunk] = executor.submit(_synthesize, client, chunk, options)
+
+        # Append chunks in order as soon as each one (and everything before it) is ready
+        with open(file_path, "wb") as output:
+            for chunk in chunks:
+                with open(futures[chunk].result(), "rb") as part:
+                    shutil.copyfileobj(part, output)
+    return file_path
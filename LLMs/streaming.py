@@ -0,0 +1,111 @@
+import time
+from typing import Optional
+
+from tools.tracing import tracer
+
+# Iterators over streamed chat completions that yield text deltas and record
+# latency metrics (time to first token, tokens per second, total latency).
+
+
+class StreamMetrics:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token_at = None
+        self.end = None
+        self.delta_count = 0
+        self.completion_tokens = None  # from the usage chunk, when the API sends one
+        self.prompt_tokens = None
+        self.text_bytes = 0
+
+    def record(self, chunk) -> Optional[str]:
+        """Update the metrics from a streamed chunk, returning its text delta, if any."""
+        usage = getattr(chunk, "usage", None)
+        if usage is not None:
+            self.completion_tokens = usage.completion_tokens
+            self.prompt_tokens = usage.prompt_tokens
+        if not chunk.choices:
+            return None
+        text = chunk.choices[0].delta.content
+        if text:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self.delta_count += 1
+            self.text_bytes += len(text)
+        return text
+
+    def finish(self) -> None:
+        if self.end is None:
+            self.end = time.perf_counter()
+            tracer.record(
+                "chat.completions.stream", "model", self.start, self.end,
+                prompt_tokens=self.prompt_tokens or 0,
+                completion_tokens=self.tokens,
+                response_bytes=self.text_bytes,
+                time_to_first_token=self.time_to_first_token,
+            )
+
+    @property
+    def tokens(self) -> int:
+        return self.completion_tokens if self.completion_tokens is not None else self.delta_count
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        return None if self.first_token_at is None else self.first_token_at - self.start
+
+    @property
+    def total_latency(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Generation rate after the first token."""
+        if self.end is None or self.first_token_at is None or self.end <= self.first_token_at:
+            return None
+        return self.tokens / (self.end - self.first_token_at)
+
+    def as_dict(self) -> dict:
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "tokens_per_second": self.tokens_per_second,
+            "total_latency": self.total_latency,
+            "tokens": self.tokens,
+        }
+
+    def __repr__(self):
+        return f"StreamMetrics({self.as_dict()})"
+
+
+class TextStream:
+    """Sync iterator of text deltas; `metrics` is complete once iteration finishes."""
+
+    def __init__(self, stream, metrics: StreamMetrics):
+        self._stream = stream
+        self.metrics = metrics
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                text = self.metrics.record(chunk)
+                if text:
+                    yield text
+        finally:
+            self.metrics.finish()
+            self._stream.close()
+
+
+class AsyncTextStream:
+    """Async iterator of text deltas; `metrics` is complete once iteration finishes."""
+
+    def __init__(self, stream, metrics: StreamMetrics):
+        self._stream = stream
+        self.metrics = metrics
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                text = self.metrics.record(chunk)
+                if text:
+                    yield text
+        finally:
+            self.metrics.finish()
+            await self._stream.close()
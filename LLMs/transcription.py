@@ -0,0 +1,163 @@
+import hashlib
+import io
+import json
+import os
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+# Parallel transcription for large audio files. The file is cut into segments
+# below the upload limit that are read lazily, one per in-flight request, so the
+# whole file is never held in memory:
+#   - WAV files are cut by duration (whole frames, each segment gets its own header)
+#   - frame-based compressed formats (mp3, aac) are cut by byte range, aligned to a frame sync
+# Segments are transcribed concurrently and stitched back together in order, with each
+# segment's timings shifted by the duration of the audio before it. Finished transcripts
+# are cached by a hash of the file content, so re-running on the same file is free.
+
+MAX_SEGMENT_BYTES = 20 * 1024 * 1024  # the API rejects uploads over 25MB
+CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "llm_snippets", "transcripts"))
+
+BYTE_RANGE_FORMATS = {".mp3", ".mpga", ".mpeg", ".aac"}
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _align_to_frame(f, offset: int, window: int = 64 * 1024) -> int:
+    """Move `offset` forward to the next MPEG frame sync so no segment starts mid-frame."""
+    f.seek(offset)
+    data = f.read(window)
+    i = data.find(b"\xff")
+    while 0 <= i < len(data) - 1:
+        if data[i + 1] & 0xE0 == 0xE0:
+            return offset + i
+        i = data.find(b"\xff", i + 1)
+    return offset
+
+
+def _byte_range_segments(path: str, segment_bytes: int) -> list:
+    """Return (start, end) byte ranges covering the file."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        offset = segment_bytes
+        while offset < size:
+            aligned = _align_to_frame(f, offset)
+            if aligned > bounds[-1]:
+                bounds.append(aligned)
+            offset = max(aligned, bounds[-1]) + segment_bytes
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _read_byte_range(path: str, start: int, end: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def _wav_segments(path: str, segment_bytes: int) -> list:
+    """Return (start_frame, frame_count) ranges covering a WAV file."""
+    with wave.open(path, "rb") as wav:
+        frame_size = wav.getsampwidth() * wav.getnchannels()
+        total = wav.getnframes()
+    frames_per_segment = max(1, segment_bytes // frame_size)
+    return [(start, min(frames_per_segment, total - start)) for start in range(0, total, frames_per_segment)]
+
+
+def _read_wav_segment(path: str, start_frame: int, frame_count: int) -> bytes:
+    with wave.open(path, "rb") as wav:
+        params = wav.getparams()
+        wav.setpos(start_frame)
+        frames = wav.readframes(frame_count)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setparams(params)
+        out.writeframes(frames)
+    return buffer.getvalue()
+
+
+def _transcribe_segment(client, name: str, data: bytes, model: str) -> dict:
+    response = client.audio.transcriptions.create(
+        model=model,
+        file=(name, data),
+        response_format="verbose_json",
+    )
+    segments = [
+        {"start": segment.start, "end": segment.end, "text": segment.text}
+        for segment in (getattr(response, "segments", None) or [])
+    ]
+    return {"text": response.text, "duration": getattr(response, "duration", None), "segments": segments}
+
+
+def transcribe_long_audio(client, file_path: str, model: str = "whisper-1", max_concurrency: int = 4, segment_bytes: int = MAX_SEGMENT_BYTES, use_cache: bool = True) -> dict:
+    """Transcribe an audio file of any size.
+
+    Returns {"text": ..., "segments": [{"start", "end", "text"}, ...]} with timings in
+    seconds from the start of the file.
+    """
+    cache_path = None
+    if use_cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        cache_path = os.path.join(CACHE_DIR, f"{file_digest(file_path)}.{model}.json")
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                return json.load(f)
+
+    extension = os.path.splitext(file_path)[1].lower()
+    name = os.path.basename(file_path)
+    if extension == ".wav":
+        with wave.open(file_path, "rb") as wav:
+            framerate = wav.getframerate()
+        ranges = _wav_segments(file_path, segment_bytes)
+        read = lambda r: _read_wav_segment(file_path, *r)
+        known_offsets = [start / framerate for start, _ in ranges]
+    elif extension in BYTE_RANGE_FORMATS:
+        ranges = _byte_range_segments(file_path, segment_bytes)
+        read = lambda r: _read_byte_range(file_path, *r)
+        known_offsets = None
+    elif os.path.getsize(file_path) <= segment_bytes:
+        ranges = [(0, os.path.getsize(file_path))]
+        read = lambda r: _read_byte_range(file_path, *r)
+        known_offsets = [0.0]
+    else:
+        raise ValueError(f"Can't split {extension} files; convert to mp3 or wav first")
+
+    # Each worker reads its own segment, so at most max_concurrency segments are in memory
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = [
+            executor.submit(lambda r: _transcribe_segment(client, name, read(r), model), r)
+            for r in ranges
+        ]
+        parts = [future.result() for future in futures]
+
+    # Stitch the parts together, shifting timings by the audio that came before
+    segments = []
+    offset = 0.0
+    for i, part in enumerate(parts):
+        if known_offsets is not None:
+            offset = known_offsets[i]
+        for segment in part["segments"]:
+            segments.append({
+                "start": segment["start"] + offset,
+                "end": segment["end"] + offset,
+                "text": segment["text"],
+            })
+        if known_offsets is None:
+            offset += part["duration"] or (part["segments"][-1]["end"] if part["segments"] else 0.0)
+
+    result = {
+        "text": " ".join(part["text"].strip() for part in parts if part["text"]),
+        "segments": segments,
+    }
+    if cache_path:
+        with open(f"{cache_path}.part", "w") as f:
+            json.dump(result, f)
+        os.replace(f"{cache_path}.part", cache_path)
+    return result
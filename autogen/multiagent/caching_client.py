@@ -0,0 +1,182 @@
+import asyncio
+import os
+import sys
+from typing import Any, AsyncGenerator, Literal, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelCapabilities, ModelInfo, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+from pydantic import BaseModel
+
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from LLMs.response_cache import ResponseCache, get_default_cache
+from tools.tracing import payload_size, tracer, usage_attributes
+
+
+class CachingChatCompletionClient(ChatCompletionClient):
+    """Model client wrapper that serves repeated requests from the shared response cache.
+
+    Requests are keyed on the messages, tools, output format and extra create args,
+    plus `namespace` (use the model name) and the wrapped client's model info.
+    Concurrent identical requests share one call (streamed or not), and LLM_CACHE_MODE=record/replay
+    records a run and replays it offline. See LLMs/response_cache.py.
+
+    Every call is also recorded as a "model" span when tracing is enabled (tools/tracing.py).
+    """
+
+    def __init__(self, client: ChatCompletionClient, cache: Optional[ResponseCache] = None, namespace: str = ""):
+        self._client = client
+        self._cache = cache or get_default_cache()
+        self._namespace = namespace
+
+    def _request(self, messages, tools, tool_choice, json_output, extra_create_args) -> dict:
+        if isinstance(json_output, type) and issubclass(json_output, BaseModel):
+            json_output = json_output.model_json_schema()
+        return {
+            "namespace": self._namespace,
+            "model_info": dict(self._client.model_info),
+            "messages": [message.model_dump() for message in messages],
+            "tools": [tool.schema if isinstance(tool, Tool) else tool for tool in tools],
+            "tool_choice": tool_choice.name if isinstance(tool_choice, Tool) else tool_choice,
+            "json_output": json_output,
+            "extra_create_args": dict(extra_create_args),
+        }
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        async def create_uncached() -> CreateResult:
+            return await self._client.create(
+                messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            )
+
+        with tracer.span(self._namespace or "create", kind="model", request_bytes=payload_size(messages)) as span:
+            if self._cache.mode == "off":
+                result = await create_uncached()
+            else:
+                fresh = False
+
+                async def create_for_cache() -> dict:
+                    nonlocal fresh
+                    fresh = True
+                    return (await create_uncached()).model_dump()
+
+                request = self._request(messages, tools, tool_choice, json_output, extra_create_args)
+                result = CreateResult.model_validate(await self._cache.get_or_create(request, create_for_cache))
+                result.cached = not fresh
+            span.set(cache_hits=int(result.cached), response_bytes=payload_size(result.content),
+                     **usage_attributes(result.usage))
+            return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        def stream_uncached() -> AsyncGenerator[Union[str, CreateResult], None]:
+            return self._client.create_stream(
+                messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            )
+
+        span = tracer.start_span(self._namespace or "create_stream", kind="model", activate=False,
+                                 request_bytes=payload_size(messages))
+        try:
+            if self._cache.mode == "off":
+                async for item in stream_uncached():
+                    if isinstance(item, CreateResult):
+                        span.set(cache_hits=0, response_bytes=payload_size(item.content), **usage_attributes(item.usage))
+                    yield item
+                return
+
+            # The caller that makes the call streams it; identical requests in flight at the
+            # same time share it through the cache and get the result replayed, like a hit
+            chunks: asyncio.Queue = asyncio.Queue()
+            fresh = False
+
+            async def stream_for_cache() -> dict:
+                nonlocal fresh
+                fresh = True
+                result = None
+                async for item in stream_uncached():
+                    chunks.put_nowait(item)
+                    if isinstance(item, CreateResult):
+                        result = item
+                if result is None:
+                    raise RuntimeError("The model stream ended without a CreateResult")
+                return result.model_dump()
+
+            request = self._request(messages, tools, tool_choice, json_output, extra_create_args)
+            with tracer.activated(span):
+                call = asyncio.ensure_future(self._cache.get_or_create(request, stream_for_cache))
+            try:
+                while not call.done():
+                    next_chunk = asyncio.ensure_future(chunks.get())
+                    await asyncio.wait({next_chunk, call}, return_when=asyncio.FIRST_COMPLETED)
+                    if not next_chunk.done():
+                        next_chunk.cancel()
+                        break
+                    yield next_chunk.result()
+                while not chunks.empty():
+                    yield chunks.get_nowait()
+                value = await call
+            finally:
+                # A consumer that stops early gives the call up; callers sharing it take it over
+                call.cancel()
+
+            result = CreateResult.model_validate(value)
+            result.cached = not fresh
+            span.set(cache_hits=int(result.cached), response_bytes=payload_size(result.content),
+                     **usage_attributes(result.usage))
+            if result.cached:
+                if isinstance(result.content, str) and result.content:
+                    yield result.content
+                yield result
+        finally:
+            tracer.end_span(span)
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._client.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self._client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self._client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._client.model_info
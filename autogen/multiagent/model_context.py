@@ -0,0 +1,146 @@
+from typing import List, Optional
+
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import (
+    AssistantMessage,
+    ChatCompletionClient,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    SystemMessage,
+    UserMessage,
+)
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a multi-agent conversation. Merge the new messages "
+    "into the existing summary. Keep decisions, facts, open feedback and the current state "
+    "of any draft; drop pleasantries and repetition. Reply with the updated summary only."
+)
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Keep the head and tail of `text` when it is longer than `limit` characters."""
+    if limit is None or len(text) <= limit:
+        return text
+    head = limit * 2 // 3
+    tail = limit - head
+    return f"{text[:head]}\n[... {len(text) - limit} characters truncated ...]\n{text[-tail:]}"
+
+
+def _message_text(message: LLMMessage) -> str:
+    """Plain-text rendering of a message for the summary."""
+    if isinstance(message, FunctionExecutionResultMessage):
+        return "\n".join(f"[{result.name} result] {result.content}" for result in message.content)
+    source = getattr(message, "source", "system")
+    if isinstance(message.content, str):
+        return f"{source}: {message.content}"
+    parts = []
+    for part in message.content:
+        if isinstance(part, str):
+            parts.append(part)
+        elif hasattr(part, "name") and hasattr(part, "arguments"):
+            parts.append(f"[called {part.name}({part.arguments})]")
+    return f"{source}: {' '.join(parts)}"
+
+
+class CompactingChatCompletionContext(ChatCompletionContext):
+    """Model context that bounds the prompt sent on each turn.
+
+    The last `keep_last` messages are sent verbatim (with oversized tool outputs and
+    messages truncated to their head and tail); everything older is folded into a
+    running summary that is only extended as messages age out, so each message is
+    summarized once. The summary is written by `summary_client` when given, otherwise
+    it is a truncated transcript.
+
+    When `model_client` is given, every call records the prompt tokens actually sent
+    and what the full history would have cost in `token_log`.
+    """
+
+    def __init__(
+        self,
+        keep_last: int = 6,
+        max_tool_output_chars: int = 2000,
+        max_message_chars: int = 4000,
+        summary_max_chars: int = 3000,
+        summary_client: Optional[ChatCompletionClient] = None,
+        model_client: Optional[ChatCompletionClient] = None,
+        initial_messages: List[LLMMessage] | None = None,
+    ) -> None:
+        super().__init__(initial_messages)
+        if keep_last <= 0:
+            raise ValueError("keep_last must be greater than 0.")
+        self._keep_last = keep_last
+        self._max_tool_output_chars = max_tool_output_chars
+        self._max_message_chars = max_message_chars
+        self._summary_max_chars = summary_max_chars
+        self._summary_client = summary_client
+        self._model_client = model_client
+        self._summary = ""
+        self._summarized = 0  # number of leading messages folded into the summary
+        self.token_log: List[dict] = []
+
+    async def clear(self) -> None:
+        await super().clear()
+        self._summary = ""
+        self._summarized = 0
+        self.token_log = []
+
+    async def load_state(self, state) -> None:
+        await super().load_state(state)
+        self._summary = ""
+        self._summarized = 0
+
+    def _compact(self, message: LLMMessage) -> LLMMessage:
+        if isinstance(message, FunctionExecutionResultMessage):
+            results = [
+                result.model_copy(update={"content": _truncate(result.content, self._max_tool_output_chars)})
+                for result in message.content
+            ]
+            return message.model_copy(update={"content": results})
+        if isinstance(message, (UserMessage, AssistantMessage)) and isinstance(message.content, str):
+            return message.model_copy(update={"content": _truncate(message.content, self._max_message_chars)})
+        return message
+
+    async def _update_summary(self, aged: List[LLMMessage]) -> None:
+        transcript = "\n".join(_truncate(_message_text(m), self._max_tool_output_chars) for m in aged)
+        if self._summary_client is not None:
+            result = await self._summary_client.create([
+                SystemMessage(content=SUMMARY_PROMPT),
+                UserMessage(content=f"Existing summary:\n{self._summary or '(none)'}\n\nNew messages:\n{transcript}", source="user"),
+            ])
+            if isinstance(result.content, str):
+                self._summary = _truncate(result.content, self._summary_max_chars)
+                return
+        # Without a summarizer keep the most recent part of the transcript
+        summary = f"{self._summary}\n{transcript}".strip()
+        self._summary = summary[-self._summary_max_chars:]
+
+    async def get_messages(self) -> List[LLMMessage]:
+        split = max(0, len(self._messages) - self._keep_last)
+        recent = self._messages[split:]
+        # Don't start the window on tool results whose call was folded into the summary
+        while recent and isinstance(recent[0], FunctionExecutionResultMessage):
+            split += 1
+            recent = recent[1:]
+
+        if split > self._summarized:
+            await self._update_summary(self._messages[self._summarized:split])
+            self._summarized = split
+
+        messages: List[LLMMessage] = []
+        if self._summary:
+            messages.append(UserMessage(content=f"Summary of the earlier conversation:\n{self._summary}", source="summary"))
+        messages.extend(self._compact(message) for message in recent)
+
+        if self._model_client is not None:
+            self.token_log.append({
+                "prompt_tokens": self._count_tokens(messages),
+                "full_history_tokens": self._count_tokens(self._messages),
+            })
+        return messages
+
+    def _count_tokens(self, messages: List[LLMMessage]) -> int:
+        try:
+            return self._model_client.count_tokens(messages)
+        except Exception:
+            # Token counting is best effort (e.g. the tokenizer can't be downloaded); estimate instead
+            return sum(len(_message_text(message)) for message in messages) // 4
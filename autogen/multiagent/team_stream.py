@@ -0,0 +1,195 @@
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Callable, Optional
+
+from aiohttp import web
+from autogen_agentchat.base import TaskResult
+from autogen_agentchat.messages import (
+    BaseChatMessage,
+    ModelClientStreamingChunkEvent,
+    ToolCallExecutionEvent,
+    ToolCallRequestEvent,
+)
+from autogen_core import CancellationToken
+
+# Incremental delivery of a team run. Instead of waiting for the TaskResult, a
+# consumer gets each piece of output as it is produced:
+#   - "token": a text delta from an agent's model (agents need model_client_stream=True)
+#   - "message": an agent's complete message; `streamed` is set when its tokens were already sent
+#   - "tool_call" / "tool_result": the tool calls an agent makes and what they returned
+#   - "stop": the end of the run, with the stop reason
+#
+#     async with TeamStream(team, "Who is Corrine Tellado?") as stream:
+#         async for event in stream:
+#             ...
+#     print(stream.stats.first_output)  # seconds until the first agent output
+#
+# `stream.cancel()`, or leaving the `async with` block before the run ends, cancels
+# the run. `create_sse_app` serves the same events as server-sent events.
+
+
+@dataclass
+class StreamEvent:
+    kind: str
+    source: str
+    content: str
+    elapsed: float  # seconds since the run started
+    streamed: bool = False
+
+
+@dataclass
+class StreamStats:
+    first_output: Optional[float] = None  # seconds until the first token or message from an agent
+    first_token: Optional[float] = None
+    first_message: Optional[float] = None
+    total: Optional[float] = None
+    tokens: int = 0
+    messages: int = 0
+    cancelled: bool = False
+
+
+class TeamStream:
+    """Async iterator of the StreamEvents of one `team.run_stream(task=task)`."""
+
+    def __init__(self, team, task, cancellation_token: Optional[CancellationToken] = None):
+        self.team = team
+        self.task = task
+        self.cancellation_token = cancellation_token or CancellationToken()
+        self.stats = StreamStats()
+        self.result: Optional[TaskResult] = None
+        self._start = None
+        self._iterator = None
+
+    def cancel(self) -> None:
+        """Stop the run; the iteration ends with a "stop" event."""
+        self.stats.cancelled = True
+        self.cancellation_token.cancel()
+
+    def _event(self, kind: str, source: str, content: str, streamed: bool = False) -> StreamEvent:
+        elapsed = time.perf_counter() - self._start
+        if kind in ("token", "message") and source != "user":
+            if self.stats.first_output is None:
+                self.stats.first_output = elapsed
+            if kind == "token" and self.stats.first_token is None:
+                self.stats.first_token = elapsed
+            if kind == "message" and self.stats.first_message is None:
+                self.stats.first_message = elapsed
+        return StreamEvent(kind, source, content, elapsed, streamed)
+
+    def __aiter__(self) -> AsyncIterator[StreamEvent]:
+        if self._iterator is None:
+            self._iterator = self._events()
+        return self._iterator
+
+    async def __aenter__(self) -> "TeamStream":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        # A loop left early doesn't close the iterator by itself; close it so the run stops now
+        if self._iterator is not None:
+            await self._iterator.aclose()
+
+    async def _events(self) -> AsyncIterator[StreamEvent]:
+        self._start = time.perf_counter()
+        # Sources whose current message has been streamed token by token
+        streaming = set()
+        stop_reason = None
+        run = self.team.run_stream(task=self.task, cancellation_token=self.cancellation_token)
+        try:
+            async for item in run:
+                if isinstance(item, TaskResult):
+                    self.result = item
+                    stop_reason = item.stop_reason
+                elif isinstance(item, ModelClientStreamingChunkEvent):
+                    self.stats.tokens += 1
+                    streaming.add(item.source)
+                    yield self._event("token", item.source, item.content)
+                elif isinstance(item, ToolCallRequestEvent):
+                    calls = ", ".join(f"{call.name}({call.arguments})" for call in item.content)
+                    yield self._event("tool_call", item.source, calls)
+                elif isinstance(item, ToolCallExecutionEvent):
+                    for result in item.content:
+                        yield self._event("tool_result", item.source, result.content)
+                elif isinstance(item, BaseChatMessage):
+                    self.stats.messages += 1
+                    streamed = item.source in streaming
+                    streaming.discard(item.source)
+                    yield self._event("message", item.source, item.to_text(), streamed)
+        except GeneratorExit:
+            raise
+        except BaseException:
+            if not self.cancellation_token.is_cancelled():
+                raise
+            # Cancelling the token cancels the agent's model or tool call mid-flight
+            stop_reason = "Cancelled"
+        finally:
+            # Also reached when the consumer stops iterating early
+            if self.result is None and not self.cancellation_token.is_cancelled():
+                self.cancel()
+            try:
+                await run.aclose()
+            except asyncio.CancelledError:
+                # The team's own tasks end with the cancellation we requested
+                if not self.stats.cancelled:
+                    raise
+            self.stats.total = time.perf_counter() - self._start
+        yield self._event("stop", "", stop_reason or "Cancelled")
+
+
+async def print_stream(stream: TeamStream) -> None:
+    """Print a run as it happens: tokens as they arrive, tool calls, and messages that weren't streamed."""
+    streaming_source = None
+    async for event in stream:
+        if event.kind == "token":
+            if event.source != streaming_source:
+                print(f"---------- {event.source} ----------")
+                streaming_source = event.source
+            print(event.content, end="", flush=True)
+        elif event.kind == "message":
+            streaming_source = None
+            if event.streamed:
+                print()
+            else:
+                print(f"---------- {event.source} ----------\n{event.content}")
+        elif event.kind == "tool_call":
+            print(f"[{event.source} calls {event.content}]")
+        elif event.kind == "stop":
+            print("Stop Reason:", event.content)
+    stats = stream.stats
+    if stats.first_output is not None:
+        first_token = f", first token after {stats.first_token:.2f}s" if stats.first_token is not None else ""
+        print(f"First output after {stats.first_output:.2f}s{first_token}; run took {stats.total:.2f}s")
+
+
+async def write_sse(response: web.StreamResponse, event: StreamEvent) -> None:
+    data = json.dumps(asdict(event))
+    await response.write(f"event: {event.kind}\ndata: {data}\n\n".encode())
+
+
+def create_sse_app(make_team: Callable[[], object], path: str = "/run") -> web.Application:
+    """aiohttp app streaming the events of a run of `make_team()` for `GET <path>?task=...`.
+
+    Every request gets its own team. A client that disconnects cancels its run.
+    """
+
+    async def run(request: web.Request) -> web.StreamResponse:
+        task = request.query.get("task")
+        if not task:
+            return web.json_response({"error": "missing 'task' query parameter"}, status=400)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        try:
+            async with TeamStream(make_team(), task) as stream:
+                async for event in stream:
+                    await write_sse(response, event)
+            await response.write(f"event: stats\ndata: {json.dumps(asdict(stream.stats))}\n\n".encode())
+        except ConnectionResetError:
+            # The client went away; leaving the block cancelled the run
+            pass
+        return response
+
+    app = web.Application()
+    app.router.add_get(path, run)
+    return app
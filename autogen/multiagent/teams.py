@@ -1,46 +1,123 @@
 import asyncio
 import os
-from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.base import TaskResult
-from autogen_agentchat.conditions import ExternalTermination, TextMentionTermination
+import sys
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_ext.models.openai import OpenAIChatCompletionClient
+from caching_client import CachingChatCompletionClient
+from model_context import CompactingChatCompletionContext
+from team_stream import TeamStream, print_stream
+from termination import budget_termination
+from traced_agent import TracedAssistantAgent
+
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Spans for every agent turn and model call; recorded when TRACE_PATH is set
+from tools.tracing import tracer
+from LLMs.rate_limiter import MAX_RETRIES, rate_limited_async_http_client
+
+# Summarizes the older turns of each agent's context (see model_context.py)
+SUMMARY_MODEL = "gpt-4o-mini"
+
+
+def create_model_client() -> CachingChatCompletionClient:
+    """An OpenAI model client; create it inside the event loop that will use it.
+
+    Responses are cached when LLM_CACHE_MODE is set (read_write, record or replay).
+    """
+    return CachingChatCompletionClient(
+        OpenAIChatCompletionClient(
+            model="gpt-4o-2024-08-06",
+            api_key=os.getenv("OPENAI_API_KEY"),
+            # Shares the process-wide rate limiter with the other OpenAI clients
+            http_client=rate_limited_async_http_client(),
+            max_retries=MAX_RETRIES,
+        ),
+        namespace="gpt-4o-2024-08-06",
+    )
+
+
+def create_summary_client() -> CachingChatCompletionClient:
+    """A cheaper model that writes the running summary of the turns that left the context window."""
+    return CachingChatCompletionClient(
+        OpenAIChatCompletionClient(
+            model=SUMMARY_MODEL,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=rate_limited_async_http_client(),
+            max_retries=MAX_RETRIES,
+        ),
+        namespace=SUMMARY_MODEL,
+    )
+
+
+def create_agents(model_client, summary_client=None) -> list:
+    """The primary and critic agents; `summary_client` summarizes the turns that leave their context."""
+    # Create the primary agent.
+    primary_agent = TracedAssistantAgent(
+        "primary",
+        model_client=model_client,
+        system_message="You are a helpful AI assistant.",
+        # Send the last few messages verbatim and a running summary of the rest
+        model_context=CompactingChatCompletionContext(keep_last=6, model_client=model_client,
+                                                      summary_client=summary_client),
+        # Stream the model output token by token (see team_stream.py)
+        model_client_stream=True,
+    )
+
+    # Create the critic agent.
+    critic_agent = TracedAssistantAgent(
+        "critic",
+        model_client=model_client,
+        system_message="Provide constructive feedback. Respond with 'APPROVE' to when your feedbacks are addressed.",
+        model_context=CompactingChatCompletionContext(keep_last=6, model_client=model_client,
+                                                      summary_client=summary_client),
+        model_client_stream=True,
+    )
+    return [primary_agent, critic_agent]
+
+
+def create_team(agents: list) -> RoundRobinGroupChat:
+    # Define a termination condition that stops the task if the critic approves,
+    # or when the round, token or time budget runs out or the drafts stop changing.
+    termination = budget_termination(
+        num_agents=2,
+        max_rounds=5,
+        max_tokens=20000,
+        timeout=120,
+        stagnation_source="primary",
+    )
+    return RoundRobinGroupChat(agents, termination_condition=termination)
 
-# Create an OpenAI model client.
-model_client = OpenAIChatCompletionClient(
-    model="gpt-4o-2024-08-06",
-    api_key=os.getenv("OPENAI_API_KEY"),
-)
-
-# Create the primary agent.
-primary_agent = AssistantAgent(
-    "primary",
-    model_client=model_client,
-    system_message="You are a helpful AI assistant.",
-)
-
-# Create the critic agent.
-critic_agent = AssistantAgent(
-    "critic",
-    model_client=model_client,
-    system_message="Provide constructive feedback. Respond with 'APPROVE' to when your feedbacks are addressed.",
-)
-
-# Define a termination condition that stops the task if the critic approves.
-text_termination = TextMentionTermination("APPROVE")
 
 # Create a team with the primary and critic agents.
 async def main():
-    team = RoundRobinGroupChat([primary_agent, critic_agent], termination_condition=text_termination)
-    
+    model_client = create_model_client()
+    summary_client = create_summary_client()
+    agents = create_agents(model_client, summary_client)
+    team = create_team(agents)
+
     # When running inside a script, use a async main function and call it from `asyncio.run(...)`.
     await team.reset()  # Reset the team for a new task.
-    async for message in team.run_stream(task="Write a short poem about the fall season."):  # type: ignore
-        if isinstance(message, TaskResult):
-            print("Stop Reason:", message.stop_reason)
-        else:
-            print(message.content)
+    try:
+        with tracer.span("team.run", kind="run"):
+            # Tokens are printed as they arrive, followed by the time to the first output
+            await print_stream(TeamStream(team, "Write a short poem about the fall season."))
+    finally:
+        # The client's connections belong to this event loop
+        await model_client.close()
+        await summary_client.close()
+
+    # Prompt tokens sent per model call, against what the full transcript would have cost
+    for agent in agents:
+        for turn, tokens in enumerate(agent.model_context.token_log, 1):
+            print(f"{agent.name} turn {turn}: {tokens['prompt_tokens']} prompt tokens "
+                  f"(full history: {tokens['full_history_tokens']})")
+
+    # Where the wall-clock time of the run went
+    if tracer.enabled:
+        print(tracer.format_summary())
 """     result = await team.run(task="Write a short poem about the fall season.")
     print(result) """
 
-asyncio.run(main())
\ No newline at end of file
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+from typing import Optional, Sequence
+
+from autogen_agentchat.base import TerminatedException, TerminationCondition
+from autogen_agentchat.conditions import (
+    MaxMessageTermination,
+    TextMentionTermination,
+    TimeoutTermination,
+    TokenUsageTermination,
+)
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, StopMessage
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = text.lower().split()
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Cheap near-duplicate score: Jaccard similarity of word trigrams (0..1)."""
+    left, right = _shingles(a), _shingles(b)
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+class StagnationTermination(TerminationCondition):
+    """Terminate when an agent's successive drafts stop changing.
+
+    Args:
+        source: Name of the agent whose drafts are compared (e.g. "primary").
+        threshold: Similarity at or above which two drafts count as unchanged.
+        patience: Number of consecutive unchanged drafts that stops the run.
+    """
+
+    def __init__(self, source: str, threshold: float = 0.9, patience: int = 1) -> None:
+        self._source = source
+        self._threshold = threshold
+        self._patience = patience
+        self._last_draft: Optional[str] = None
+        self._unchanged = 0
+        self._terminated = False
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    async def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> StopMessage | None:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            # Any chat message counts as a draft (a TextMessage, or the ToolCallSummaryMessage of a tool-using agent)
+            if not isinstance(message, BaseChatMessage) or message.source != self._source:
+                continue
+            draft = message.to_text()
+            if self._last_draft is not None:
+                score = similarity(self._last_draft, draft)
+                self._unchanged = self._unchanged + 1 if score >= self._threshold else 0
+                if self._unchanged >= self._patience:
+                    self._terminated = True
+                    return StopMessage(
+                        content=f"Drafts from '{self._source}' stopped changing (similarity {score:.2f})",
+                        source="StagnationTermination",
+                    )
+            self._last_draft = draft
+        return None
+
+    async def reset(self) -> None:
+        self._last_draft = None
+        self._unchanged = 0
+        self._terminated = False
+
+
+def budget_termination(
+    num_agents: int,
+    approve_text: str = "APPROVE",
+    max_rounds: int = 5,
+    max_tokens: int = 30000,
+    timeout: float = 180,
+    stagnation_source: Optional[str] = None,
+) -> TerminationCondition:
+    """Stop on approval or when the first budget runs out, whichever comes first.
+
+    Budgets: rounds (one message per agent), total model tokens, wall-clock seconds,
+    and, when `stagnation_source` is set, that agent's drafts no longer changing.
+    The condition that fired is reported in `TaskResult.stop_reason`.
+    """
+    condition = (
+        TextMentionTermination(approve_text)
+        | MaxMessageTermination(max_rounds * num_agents + 1)  # +1 for the task message
+        | TokenUsageTermination(max_total_token=max_tokens)
+        | TimeoutTermination(timeout)
+    )
+    if stagnation_source is not None:
+        condition = condition | StagnationTermination(stagnation_source)
+    return condition
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from autogen_core import CancellationToken
+from autogen_core.tools import BaseTool, FunctionTool
+from pydantic import BaseModel
+
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tools.tracing import payload_size, tracer
+
+# Team-scoped tool execution. Every agent of a team gets its tools through the
+# same ToolExecutor, which:
+#   - memoizes results by tool name and arguments for the length of a run, so a
+#     query searched by one agent is free for the next one
+#   - runs each call as its own task, so the several tool calls a model sends in
+#     one turn (which AssistantAgent gathers) run concurrently, and identical calls
+#     in flight at the same time are merged into one
+#   - records the latency of each call and whether it was served from the cache
+
+
+@dataclass
+class ToolCallRecord:
+    tool: str
+    arguments: dict
+    latency: float
+    cache_hit: bool
+    error: Optional[str] = None
+
+
+class ToolExecutor:
+    """Shared memo and call log for the tools of one team run.
+
+    Call `reset()` between runs (e.g. next to `team.reset()`) to start with an empty cache.
+    """
+
+    def __init__(self) -> None:
+        self._results: Dict[str, asyncio.Task] = {}
+        self.records: List[ToolCallRecord] = []
+
+    def wrap(self, tool: Union[BaseTool, Callable[..., Any]]) -> "ExecutorTool":
+        """Route `tool` (a tool or an async function) through this executor."""
+        if not isinstance(tool, BaseTool):
+            tool = FunctionTool(tool, description=tool.__doc__ or tool.__name__)
+        return ExecutorTool(tool, self)
+
+    def wrap_all(self, tools) -> List["ExecutorTool"]:
+        return [self.wrap(tool) for tool in tools]
+
+    @staticmethod
+    def _key(name: str, arguments: dict) -> str:
+        return f"{name}:{json.dumps(arguments, sort_keys=True, default=str)}"
+
+    async def call(self, tool: BaseTool, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        arguments = args.model_dump()
+        key = self._key(tool.name, arguments)
+        start = time.perf_counter()
+
+        task = self._results.get(key)
+        cache_hit = task is not None
+        with tracer.span(tool.name, kind="tool_call", cache_hits=int(cache_hit), request_bytes=payload_size(arguments)) as span:
+            if task is None:
+                # The call runs as its own task, with its own token, so that a cancelled caller
+                # doesn't cancel it for the other callers waiting on the same result
+                task = asyncio.ensure_future(tool.run(args, CancellationToken()))
+                self._results[key] = task
+            # The caller's token only cancels this caller's wait
+            waiter = asyncio.shield(task)
+            cancellation_token.link_future(waiter)
+            try:
+                result = await waiter
+            except Exception as e:
+                # Failures are not memoized; the next call tries again
+                if self._results.get(key) is task:
+                    del self._results[key]
+                self.records.append(ToolCallRecord(tool.name, arguments, time.perf_counter() - start, cache_hit, str(e)))
+                raise
+            span.set(response_bytes=payload_size(result))
+        self.records.append(ToolCallRecord(tool.name, arguments, time.perf_counter() - start, cache_hit))
+        return result
+
+    def reset(self) -> None:
+        self._results.clear()
+        self.records = []
+
+    def stats(self) -> dict:
+        """Per-tool call counts, cache hits and latency."""
+        stats = {}
+        for record in self.records:
+            tool = stats.setdefault(record.tool, {"calls": 0, "cache_hits": 0, "errors": 0, "total_latency": 0.0})
+            tool["calls"] += 1
+            tool["cache_hits"] += record.cache_hit
+            tool["errors"] += record.error is not None
+            tool["total_latency"] += record.latency
+        for tool in stats.values():
+            tool["mean_latency"] = tool["total_latency"] / tool["calls"]
+        return stats
+
+
+class ExecutorTool(BaseTool[BaseModel, Any]):
+    """A tool whose calls go through a ToolExecutor; same name, schema and result as the wrapped tool."""
+
+    def __init__(self, tool: BaseTool, executor: ToolExecutor) -> None:
+        super().__init__(
+            args_type=tool.args_type(),
+            return_type=tool.return_type(),
+            name=tool.name,
+            description=tool.description,
+            strict=tool.schema.get("strict", False),
+        )
+        self._tool = tool
+        self._executor = executor
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        return await self._executor.call(self._tool, args, cancellation_token)
+
+    def return_value_as_string(self, value: Any) -> str:
+        return self._tool.return_value_as_string(value)
@@ -1,7 +1,6 @@
-from autogen_agentchat.agents import AssistantAgent
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.conditions import TextMentionTermination
+from aiohttp import web
 import asyncio
 import sys
 import os
@@ -10,50 +9,161 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 # Import web_search from the tools package
-from tools.web_search import web_search
-
-
-# Create an agent that uses the OpenAI GPT-4o model.
-model_client = OpenAIChatCompletionClient(
-    model="gpt-4o",
-    # You should consider using environment variables for API keys
-    api_key=os.getenv("OPENAI_API_KEY"),
-)
-
-tool_user = AssistantAgent(
-    name="tool_user",
-    model_client=model_client,
-    tools=[web_search],
-    system_message="You are a helpful AI assistant with access to a web search tool. Use the tool to find information when needed, then provide a thorough response to the user's query.",
-)
-
-tool_assistant = AssistantAgent(
-    name="tool_assistant",
-    model_client=model_client,
-    tools=[web_search],
-    system_message="You are a helpful AI assistant improve the web search tool response. Return a user friendly response to the user.",
-)
-
-critic_agent = AssistantAgent(
-    "critic",
-    model_client=model_client,
-    system_message="Provide constructive feedback. Respond with 'APPROVE' to when your feedbacks are addressed.",
-)
-
-async def assistant_run() -> None:
-    text_termination = TextMentionTermination("APPROVE")
-    team = RoundRobinGroupChat([tool_user, tool_assistant, critic_agent], termination_condition=text_termination)
-    
-    """     async for message in team.run_stream(task="Where are the next Olimpiadi?"):  # type: ignore
-        if isinstance(message, TaskResult):
-            print("Stop Reason:", message.stop_reason)
-        else:
-            print(message.content) """
-    
-    result = await team.run(task="Who is Corrine Tellado?")
-    print(result.messages[-2].content)
+from tools.web_search import close_session, web_search
+from caching_client import CachingChatCompletionClient
+from model_context import CompactingChatCompletionContext
+from team_stream import TeamStream, create_sse_app, print_stream
+from termination import budget_termination
+from tool_executor import ToolExecutor
+from traced_agent import TracedAssistantAgent
+from tools.tracing import tracer
+from LLMs.rate_limiter import MAX_RETRIES, rate_limited_async_http_client
+
+# Summarizes the older turns of each agent's context (see model_context.py)
+SUMMARY_MODEL = "gpt-4o-mini"
+
+
+def create_model_client() -> CachingChatCompletionClient:
+    """The OpenAI GPT-4o client the agents use; create it inside the event loop that will use it.
+
+    Responses are cached when LLM_CACHE_MODE is set (read_write, record or replay).
+    """
+    return CachingChatCompletionClient(
+        OpenAIChatCompletionClient(
+            model="gpt-4o",
+            # You should consider using environment variables for API keys
+            api_key=os.getenv("OPENAI_API_KEY"),
+            # Let the model request several searches in one turn; they run concurrently
+            parallel_tool_calls=True,
+            # Shares the process-wide rate limiter with the other OpenAI clients
+            http_client=rate_limited_async_http_client(),
+            max_retries=MAX_RETRIES,
+        ),
+        namespace="gpt-4o",
+    )
+
+
+def create_summary_client() -> CachingChatCompletionClient:
+    """A cheaper model that writes the running summary of the turns that left the context window."""
+    return CachingChatCompletionClient(
+        OpenAIChatCompletionClient(
+            model=SUMMARY_MODEL,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=rate_limited_async_http_client(),
+            max_retries=MAX_RETRIES,
+        ),
+        namespace=SUMMARY_MODEL,
+    )
+
+
+def create_agents(tool_executor: ToolExecutor, model_client, summary_client=None) -> list:
+    """The tool_user, tool_assistant and critic agents of one run.
+
+    Both searching agents go through `tool_executor`, so a query one agent already
+    ran is answered from memory for the other for the rest of the run. The agents
+    stream their model output token by token (see team_stream.py), and
+    `summary_client` summarizes the turns that leave their context.
+    """
+    search_tools = tool_executor.wrap_all([web_search])
+
+    tool_user = TracedAssistantAgent(
+        name="tool_user",
+        model_client=model_client,
+        tools=search_tools,
+        system_message="You are a helpful AI assistant with access to a web search tool. Use the tool to find information when needed, then provide a thorough response to the user's query.",
+        # Send the last few messages verbatim, truncate long search extracts and summarize the rest
+        model_context=CompactingChatCompletionContext(keep_last=6, model_client=model_client,
+                                                      summary_client=summary_client),
+        model_client_stream=True,
+    )
+
+    tool_assistant = TracedAssistantAgent(
+        name="tool_assistant",
+        model_client=model_client,
+        tools=search_tools,
+        system_message="You are a helpful AI assistant improve the web search tool response. Return a user friendly response to the user.",
+        model_context=CompactingChatCompletionContext(keep_last=6, model_client=model_client,
+                                                      summary_client=summary_client),
+        model_client_stream=True,
+    )
+
+    critic_agent = TracedAssistantAgent(
+        "critic",
+        model_client=model_client,
+        system_message="Provide constructive feedback. Respond with 'APPROVE' to when your feedbacks are addressed.",
+        model_context=CompactingChatCompletionContext(keep_last=6, model_client=model_client,
+                                                      summary_client=summary_client),
+        model_client_stream=True,
+    )
+    return [tool_user, tool_assistant, critic_agent]
+
+
+def create_team(agents: list) -> RoundRobinGroupChat:
+    # Stop when the critic approves, or when a round/token/time budget runs out
+    # or the assistant's answers stop changing
+    termination = budget_termination(
+        num_agents=3,
+        max_rounds=4,
+        max_tokens=40000,
+        timeout=180,
+        stagnation_source="tool_assistant",
+    )
+    return RoundRobinGroupChat(agents, termination_condition=termination)
+
+
+async def assistant_run(task: str = "Who is Corrine Tellado?") -> None:
+    model_client = create_model_client()
+    summary_client = create_summary_client()
+    tool_executor = ToolExecutor()
+    agents = create_agents(tool_executor, model_client, summary_client)
+    team = create_team(agents)
+
+    # Print each agent's output as it is generated rather than after the last round
+    try:
+        with tracer.span("team.run", kind="run"):
+            await print_stream(TeamStream(team, task))
+    finally:
+        # The search session and the model client's connections belong to this event loop
+        await close_session()
+        await model_client.close()
+        await summary_client.close()
+
+    for record in tool_executor.records:
+        print(f"{record.tool}({record.arguments}): {record.latency * 1000:.0f}ms"
+              f"{' (cached)' if record.cache_hit else ''}")
+
+    # Prompt tokens sent per model call, against what the full transcript would have cost
+    for agent in agents:
+        for turn, tokens in enumerate(agent.model_context.token_log, 1):
+            print(f"{agent.name} turn {turn}: {tokens['prompt_tokens']} prompt tokens "
+                  f"(full history: {tokens['full_history_tokens']})")
+
+    # Where the wall-clock time of the run went
+    if tracer.enabled:
+        print(tracer.format_summary())
+
+
+def serve(port: int) -> None:
+    """Serve runs as server-sent events: GET /run?task=... streams tokens, tool calls and messages."""
+    # One client for all runs, so they share its connections; created once the server's loop runs
+    clients = {}
+    app = create_sse_app(lambda: create_team(create_agents(ToolExecutor(), clients["model"], clients["summary"])))
+
+    async def model_clients(app):
+        clients["model"] = create_model_client()
+        clients["summary"] = create_summary_client()
+        yield
+        await close_session()
+        await clients["model"].close()
+        await clients["summary"].close()
+
+    app.cleanup_ctx.append(model_clients)
+    web.run_app(app, host="127.0.0.1", port=port)
 
 
 # Use asyncio.run when running in a script
 if __name__ == "__main__":
-    asyncio.run(assistant_run())
\ No newline at end of file
+    if len(sys.argv) == 3 and sys.argv[1] == "--serve":
+        serve(int(sys.argv[2]))
+    else:
+        asyncio.run(assistant_run())
\ No newline at end of file
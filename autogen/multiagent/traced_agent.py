@@ -0,0 +1,45 @@
+import os
+import sys
+from typing import AsyncGenerator, Sequence
+
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage
+from autogen_core import CancellationToken
+
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tools.tracing import payload_size, tracer
+
+
+class TracedAssistantAgent(AssistantAgent):
+    """AssistantAgent that records each of its turns as an "agent_turn" span.
+
+    The model calls and tool calls made during the turn become children of that span.
+    Nothing is recorded unless tracing is enabled (see tools/tracing.py).
+    """
+
+    async def on_messages_stream(
+        self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken
+    ) -> AsyncGenerator[BaseAgentEvent | BaseChatMessage | Response, None]:
+        span = tracer.start_span(self.name, kind="agent_turn", activate=False,
+                                 request_bytes=sum(payload_size(m.to_text()) for m in messages))
+        stream = super().on_messages_stream(messages, cancellation_token)
+        try:
+            while True:
+                # The turn is the current span only while the agent works, not while the caller handles an item
+                with tracer.activated(span):
+                    try:
+                        item = await stream.__anext__()
+                    except StopAsyncIteration:
+                        break
+                if isinstance(item, Response):
+                    span.set(response_bytes=payload_size(item.chat_message.to_text()))
+                yield item
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            await stream.aclose()
+            tracer.end_span(span)
@@ -1,37 +1,108 @@
+import logging
+import queue
+import time
 from dataclasses import dataclass
-from typing import Callable
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+from typing import Callable, List, Optional
 
 from autogen_core import DefaultTopicId, MessageContext, RoutedAgent, default_subscription, message_handler
 
+# Agents log here in quiet mode instead of printing every hop
+logger = logging.getLogger("quickstart")
+
+# Called with (agent type, seconds since the message was published) on every hop
+HopCallback = Callable[[str, float], None]
+
 
 @dataclass
 class Message:
     content: int
+    sent_at: float = 0.0  # time.perf_counter() when published, for hop latency
+
+
+@dataclass
+class MessageBatch:
+    """Many values moving through the pipeline together, for one dispatch per hop."""
+    contents: List[int]
+    sent_at: float = 0.0
+
+
+def enable_quiet_logging(handler: Optional[logging.Handler] = None, capacity: int = 1000) -> QueueListener:
+    """Route the agents' logging through a queue to a buffered handler on a background thread.
+
+    Logging calls in the agents only enqueue the record; formatting and writing happen
+    on the listener thread, in blocks of `capacity` records. Call `.stop()` on the
+    returned listener to flush.
+    """
+    target = handler or logging.StreamHandler()
+    buffered = MemoryHandler(capacity, flushLevel=logging.ERROR, target=target)
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, buffered)
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener.start()
+    return listener
+
+
+class _PipelineAgent(RoutedAgent):
+    def __init__(self, description: str, quiet: bool, on_hop: Optional[HopCallback]) -> None:
+        super().__init__(description)
+        self._quiet = quiet
+        self._on_hop = on_hop
+
+    def _received(self, message: Message | MessageBatch) -> None:
+        if self._on_hop is not None and message.sent_at:
+            self._on_hop(self.id.type, time.perf_counter() - message.sent_at)
+
+    def _log(self, msg: str, *args) -> None:
+        if self._quiet:
+            logger.info(msg, *args)
+        else:
+            print(f"{'-'*80}\n{self.__class__.__name__}:\n{msg % args}")
 
 
 @default_subscription
-class Modifier(RoutedAgent):
-    def __init__(self, modify_val: Callable[[int], int]) -> None:
-        super().__init__("A modifier agent.")
+class Modifier(_PipelineAgent):
+    def __init__(self, modify_val: Callable[[int], int], quiet: bool = False, on_hop: Optional[HopCallback] = None) -> None:
+        super().__init__("A modifier agent.", quiet, on_hop)
         self._modify_val = modify_val
 
     @message_handler
     async def handle_message(self, message: Message, ctx: MessageContext) -> None:
+        self._received(message)
         val = self._modify_val(message.content)
-        print(f"{'-'*80}\nModifier:\nModified {message.content} to {val}")
-        await self.publish_message(Message(content=val), DefaultTopicId())  # type: ignore
+        self._log("Modified %s to %s", message.content, val)
+        await self.publish_message(Message(content=val, sent_at=time.perf_counter()), DefaultTopicId())  # type: ignore
+
+    @message_handler
+    async def handle_batch(self, message: MessageBatch, ctx: MessageContext) -> None:
+        self._received(message)
+        vals = [self._modify_val(value) for value in message.contents]
+        self._log("Modified %s values", len(vals))
+        await self.publish_message(MessageBatch(contents=vals, sent_at=time.perf_counter()), DefaultTopicId())  # type: ignore
 
 
 @default_subscription
-class Checker(RoutedAgent):
-    def __init__(self, run_until: Callable[[int], bool]) -> None:
-        super().__init__("A checker agent.")
+class Checker(_PipelineAgent):
+    def __init__(self, run_until: Callable[[int], bool], quiet: bool = False, on_hop: Optional[HopCallback] = None) -> None:
+        super().__init__("A checker agent.", quiet, on_hop)
         self._run_until = run_until
 
     @message_handler
     async def handle_message(self, message: Message, ctx: MessageContext) -> None:
+        self._received(message)
         if not self._run_until(message.content):
-            print(f"{'-'*80}\nChecker:\n{message.content} passed the check, continue.")
-            await self.publish_message(Message(content=message.content), DefaultTopicId())
+            self._log("%s passed the check, continue.", message.content)
+            await self.publish_message(Message(content=message.content, sent_at=time.perf_counter()), DefaultTopicId())
         else:
-            print(f"{'-'*80}\nChecker:\n{message.content} failed the check, stopping.")
\ No newline at end of file
+            self._log("%s failed the check, stopping.", message.content)
+
+    @message_handler
+    async def handle_batch(self, message: MessageBatch, ctx: MessageContext) -> None:
+        self._received(message)
+        # Values that are done drop out; the rest continue as one smaller batch
+        remaining = [value for value in message.contents if not self._run_until(value)]
+        self._log("%s of %s values passed the check", len(remaining), len(message.contents))
+        if remaining:
+            await self.publish_message(MessageBatch(contents=remaining, sent_at=time.perf_counter()), DefaultTopicId())
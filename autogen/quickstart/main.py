@@ -1,10 +1,21 @@
+import asyncio
+import sys
+from typing import Optional
+
 from autogen_core import AgentId, SingleThreadedAgentRuntime
 from agent_modules import Modifier, Checker, Message
-# Create an local embedded runtime.
-runtime = SingleThreadedAgentRuntime()
+from sharded_runtime import ShardedAgentRuntime
+
+
+def create_runtime(workers: Optional[int] = None):
+    """A local embedded runtime, or one hosting the agents in `workers` worker processes."""
+    if workers:
+        return ShardedAgentRuntime(num_workers=workers)
+    return SingleThreadedAgentRuntime()
+
 
 # Start the runtime and send a direct message to the checker.
-async def main():
+async def main(runtime, pipelines: int = 1) -> None:
     # Register agents inside the async function
     await Modifier.register(
         runtime,
@@ -19,11 +30,22 @@ async def main():
         # Run until the value is less than or equal to 1
         lambda: Checker(run_until=lambda x: x <= 1),
     )
-    
+
     # Start the runtime
     runtime.start()
-    await runtime.send_message(Message(10), AgentId("checker", "default"))
+    if pipelines == 1:
+        await runtime.send_message(Message(10), AgentId("checker", "default"))
+    else:
+        # Each pipeline is its own agent key, so a sharded runtime spreads them over its workers
+        await asyncio.gather(*(
+            runtime.send_message(Message(10), AgentId("checker", f"pipeline-{i}")) for i in range(pipelines)
+        ))
     await runtime.stop_when_idle()
 
-import asyncio
-asyncio.run(main())
\ No newline at end of file
+
+# Run `python main.py --workers N` to host the agents in N worker processes instead,
+# and add `--pipelines M` to run M independent pipelines that the workers share.
+if __name__ == "__main__":
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else None
+    pipelines = int(sys.argv[sys.argv.index("--pipelines") + 1]) if "--pipelines" in sys.argv else 1
+    asyncio.run(main(create_runtime(workers), pipelines))
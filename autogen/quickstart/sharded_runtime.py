@@ -0,0 +1,377 @@
+import asyncio
+import inspect
+import multiprocessing
+import pickle
+import sys
+import threading
+import zlib
+from queue import SimpleQueue
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from autogen_core import AgentId, AgentType, MessageContext, SingleThreadedAgentRuntime, TopicId
+
+# A runtime that spreads agent instances over N worker processes.
+#
+# Every worker runs a SingleThreadedAgentRuntime with all registered agent types, and
+# hosts the instances whose key hashes to it. Agents publish with DefaultTopicId(),
+# whose source is their own key, so a stream of messages between agents sharing a key
+# (the quickstart's checker/default and modifier/default) stays inside one worker.
+# Messages for a key owned by another worker are forwarded over pipes, through this
+# process, which routes them by key.
+#
+# Workers are forked after registration so they inherit the agent factories (which
+# are usually lambdas and can't be pickled); this needs the "fork" start method
+# (Linux, macOS). Agent factories must take no arguments, messages must be
+# picklable, and cancellation tokens don't cross processes.
+
+PARENT = -1
+
+
+def shard_of(key: str, num_shards: int) -> int:
+    """Worker that owns agent key `key` (stable across processes)."""
+    return zlib.crc32(key.encode()) % num_shards
+
+
+def _portable_exception(e: BaseException) -> BaseException:
+    try:
+        pickle.dumps(e)
+        return e
+    except Exception:
+        return RuntimeError(f"{type(e).__name__}: {e}")
+
+
+class _Outbox:
+    """Writes frames to a pipe from a background thread, batching whatever is queued.
+
+    Writing off the event loop means a full pipe never blocks a process that also has
+    to keep reading, so two processes can't deadlock writing to each other.
+    """
+
+    def __init__(self, conn) -> None:
+        self._conn = conn
+        self._queue = SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, frame: tuple) -> None:
+        self._queue.put(frame)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            frames = [self._queue.get()]
+            while not self._queue.empty():
+                frames.append(self._queue.get())
+            closing = frames[-1] is None
+            frames = [frame for frame in frames if frame is not None]
+            try:
+                if frames:
+                    self._conn.send(frames)
+            except (BrokenPipeError, OSError):
+                return
+            if closing:
+                return
+
+
+def _listen(conn, handle) -> None:
+    """Call `handle(frame)` on the running loop for every frame arriving on `conn`."""
+    loop = asyncio.get_running_loop()
+
+    def on_readable() -> None:
+        try:
+            while conn.poll():
+                for frame in conn.recv():
+                    handle(frame)
+        except (EOFError, OSError):
+            loop.remove_reader(conn.fileno())
+
+    loop.add_reader(conn.fileno(), on_readable)
+
+
+class _ShardRuntime(SingleThreadedAgentRuntime):
+    """The runtime inside one worker: local keys are delivered here, the rest forwarded."""
+
+    def __init__(self, shard: int, num_shards: int, outbox: _Outbox) -> None:
+        super().__init__()
+        self._shard = shard
+        self._num_shards = num_shards
+        self._outbox = outbox
+        self._pending: Dict[tuple, asyncio.Future] = {}
+        self._next_request = 0
+        self._tasks = set()
+        self._subscriptions: list = []
+        # Messages delivered here whose handlers haven't finished yet
+        self._outstanding = 0
+        self.sent = 0
+        self.received = 0
+
+    def _forward(self, frame: tuple) -> None:
+        self.sent += 1
+        self._outbox.put(frame)
+
+    async def add_subscription(self, subscription) -> None:
+        await super().add_subscription(subscription)
+        self._subscriptions.append(subscription)
+
+    def counted(self, agent_factory: Callable[[], Any]) -> Callable[[], Awaitable[Any]]:
+        """Wrap a factory so its agents mark published messages as handled when their handler returns."""
+        async def create():
+            agent = agent_factory()
+            if inspect.isawaitable(agent):
+                agent = await agent
+            on_message = agent.on_message
+
+            async def counted_on_message(message: Any, ctx: MessageContext) -> Any:
+                try:
+                    return await on_message(message, ctx)
+                finally:
+                    if not ctx.is_rpc:
+                        self._outstanding -= 1
+
+            agent.on_message = counted_on_message
+            return agent
+        return create
+
+    async def publish_message(self, message: Any, topic_id: TopicId, *, sender: Optional[AgentId] = None, cancellation_token=None, message_id: Optional[str] = None) -> None:
+        if shard_of(topic_id.source, self._num_shards) != self._shard:
+            sender_id = (sender.type, sender.key) if sender is not None else None
+            self._forward(("publish", message, topic_id.type, topic_id.source, sender_id, message_id))
+            return
+        # One delivery per subscribed agent, except the sender
+        recipients = {subscription.map_to_agent(topic_id) for subscription in self._subscriptions if subscription.is_match(topic_id)}
+        recipients.discard(sender)
+        self._outstanding += len(recipients)
+        await super().publish_message(message, topic_id, sender=sender, cancellation_token=cancellation_token, message_id=message_id)
+
+    async def send_message(self, message: Any, recipient: AgentId, *, sender: Optional[AgentId] = None, cancellation_token=None, message_id: Optional[str] = None) -> Any:
+        if shard_of(recipient.key, self._num_shards) != self._shard:
+            request_id = (self._shard, self._next_request)
+            self._next_request += 1
+            future = self._pending[request_id] = asyncio.get_running_loop().create_future()
+            sender_id = (sender.type, sender.key) if sender is not None else None
+            self._forward(("send", request_id, message, (recipient.type, recipient.key), sender_id))
+            return await future
+        self._outstanding += 1
+        try:
+            return await super().send_message(message, recipient, sender=sender, cancellation_token=cancellation_token, message_id=message_id)
+        finally:
+            self._outstanding -= 1
+
+    def idle(self) -> bool:
+        return not self._tasks and self._outstanding == 0
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _answer(self, request_id: tuple, message: Any, recipient: tuple, sender: Optional[tuple]) -> None:
+        try:
+            result = await self.send_message(message, AgentId(*recipient), sender=AgentId(*sender) if sender else None)
+            self._forward(("reply", request_id, True, result))
+        except BaseException as e:
+            self._forward(("reply", request_id, False, _portable_exception(e)))
+
+    def handle(self, frame: tuple) -> None:
+        kind = frame[0]
+        if kind == "publish":
+            self.received += 1
+            _, message, topic_type, topic_source, sender, message_id = frame
+            self._spawn(self.publish_message(
+                message, TopicId(topic_type, topic_source),
+                sender=AgentId(*sender) if sender else None, message_id=message_id,
+            ))
+        elif kind == "send":
+            self.received += 1
+            self._spawn(self._answer(*frame[1:]))
+        elif kind == "reply":
+            self.received += 1
+            _, request_id, ok, value = frame
+            future = self._pending.pop(request_id)
+            future.set_result(value) if ok else future.set_exception(value)
+        elif kind == "probe":
+            # Sent after the counters so the router sees a consistent snapshot
+            self._outbox.put(("status", self._shard, frame[1], self.idle(), self.sent, self.received))
+
+
+async def _serve(shard: int, num_shards: int, conn, registrations: list, subscriptions: list, serializers: list) -> None:
+    outbox = _Outbox(conn)
+    runtime = _ShardRuntime(shard, num_shards, outbox)
+    for agent_type, factory, expected_class in registrations:
+        await runtime.register_factory(agent_type, runtime.counted(factory), expected_class=expected_class)
+    for subscription in subscriptions:
+        await runtime.add_subscription(subscription)
+    for serializer in serializers:
+        runtime.add_message_serializer(serializer)
+
+    stopped = asyncio.Event()
+
+    def handle(frame: tuple) -> None:
+        if frame[0] == "stop":
+            stopped.set()
+        else:
+            runtime.handle(frame)
+
+    runtime.start()
+    _listen(conn, handle)
+    await stopped.wait()
+    await runtime.stop()
+    outbox.close()
+
+
+def _worker_main(shard: int, num_shards: int, conn, unused_conns: list, *args) -> None:
+    for unused in unused_conns:
+        unused.close()
+    asyncio.run(_serve(shard, num_shards, conn, *args))
+    sys.stdout.flush()
+
+
+class ShardedAgentRuntime:
+    """Agent runtime that hosts agent instances in `num_workers` processes, sharded by agent key.
+
+    Register agents exactly as with SingleThreadedAgentRuntime (`await Modifier.register(runtime, ...)`),
+    then `start()`, `send_message`/`publish_message` and `stop_when_idle()`. Only that subset of the
+    runtime API is supported.
+    """
+
+    def __init__(self, num_workers: int = 2, probe_interval: float = 0.01) -> None:
+        self.num_workers = num_workers
+        self.probe_interval = probe_interval
+        self._registrations: List[tuple] = []
+        self._subscriptions: list = []
+        self._serializers: list = []
+        self._processes: list = []
+        self._conns: list = []
+        self._outboxes: List[_Outbox] = []
+        self._pending: Dict[tuple, asyncio.Future] = {}
+        self._next_request = 0
+        self._statuses: Dict[int, dict] = {}
+        self._probe_round = 0
+        self._probe_done: Optional[asyncio.Future] = None
+        self.sent = 0
+        self.received = 0
+
+    async def register_factory(self, type, agent_factory, *, expected_class=None) -> AgentType:
+        if self._processes:
+            raise RuntimeError("Agents must be registered before the runtime is started")
+        agent_type = AgentType(type) if isinstance(type, str) else type
+        self._registrations.append((agent_type.type, agent_factory, expected_class))
+        return agent_type
+
+    async def add_subscription(self, subscription) -> None:
+        if self._processes:
+            raise RuntimeError("Subscriptions must be added before the runtime is started")
+        self._subscriptions.append(subscription)
+
+    def add_message_serializer(self, serializer) -> None:
+        if isinstance(serializer, (list, tuple)):
+            self._serializers.extend(serializer)
+        else:
+            self._serializers.append(serializer)
+
+    def start(self) -> None:
+        if self._processes:
+            raise RuntimeError("Runtime is already started")
+        context = multiprocessing.get_context("fork")
+        pipes = [context.Pipe() for _ in range(self.num_workers)]
+        # Don't let the children inherit (and print) anything still buffered here
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for shard, (parent_conn, child_conn) in enumerate(pipes):
+            unused = [conn for i, pair in enumerate(pipes) for conn in pair if conn is not child_conn]
+            process = context.Process(
+                target=_worker_main,
+                args=(shard, self.num_workers, child_conn, unused,
+                      self._registrations, self._subscriptions, self._serializers),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        # Outbox threads are only started once every worker is forked
+        for parent_conn, child_conn in pipes:
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._outboxes.append(_Outbox(parent_conn))
+            _listen(parent_conn, self._route)
+
+    def _route(self, frame: tuple) -> None:
+        kind = frame[0]
+        if kind == "publish":
+            self._outboxes[shard_of(frame[3], self.num_workers)].put(frame)
+        elif kind == "send":
+            self._outboxes[shard_of(frame[3][1], self.num_workers)].put(frame)
+        elif kind == "reply":
+            origin = frame[1][0]
+            if origin != PARENT:
+                self._outboxes[origin].put(frame)
+                return
+            self.received += 1
+            _, request_id, ok, value = frame
+            future = self._pending.pop(request_id)
+            future.set_result(value) if ok else future.set_exception(value)
+        elif kind == "status":
+            _, shard, probe_round, idle, sent, received = frame
+            if probe_round == self._probe_round:
+                self._statuses[shard] = {"idle": idle, "sent": sent, "received": received}
+                if len(self._statuses) == self.num_workers and not self._probe_done.done():
+                    self._probe_done.set_result(dict(self._statuses))
+
+    async def send_message(self, message: Any, recipient: AgentId, *, sender: Optional[AgentId] = None, cancellation_token=None, message_id: Optional[str] = None) -> Any:
+        request_id = (PARENT, self._next_request)
+        self._next_request += 1
+        future = self._pending[request_id] = asyncio.get_running_loop().create_future()
+        sender_id = (sender.type, sender.key) if sender is not None else None
+        self.sent += 1
+        self._outboxes[shard_of(recipient.key, self.num_workers)].put(
+            ("send", request_id, message, (recipient.type, recipient.key), sender_id)
+        )
+        return await future
+
+    async def publish_message(self, message: Any, topic_id: TopicId, *, sender: Optional[AgentId] = None, cancellation_token=None, message_id: Optional[str] = None) -> None:
+        sender_id = (sender.type, sender.key) if sender is not None else None
+        self.sent += 1
+        self._outboxes[shard_of(topic_id.source, self.num_workers)].put(
+            ("publish", message, topic_id.type, topic_id.source, sender_id, message_id)
+        )
+
+    async def _probe(self) -> dict:
+        self._probe_round += 1
+        self._statuses = {}
+        self._probe_done = asyncio.get_running_loop().create_future()
+        for outbox in self._outboxes:
+            outbox.put(("probe", self._probe_round))
+        return await self._probe_done
+
+    async def stop_when_idle(self) -> None:
+        """Stop once every worker is idle and no message is in flight between processes.
+
+        Counts of forwarded messages are collected in rounds; the run is over when two
+        consecutive rounds find every worker idle and the same, balanced, counts.
+        """
+        previous = None
+        while True:
+            statuses = await self._probe()
+            sent = self.sent + sum(status["sent"] for status in statuses.values())
+            received = self.received + sum(status["received"] for status in statuses.values())
+            quiet = all(status["idle"] for status in statuses.values()) and sent == received
+            if quiet and previous == (sent, received):
+                break
+            previous = (sent, received) if quiet else None
+            await asyncio.sleep(self.probe_interval)
+        await self.stop()
+
+    async def stop(self) -> None:
+        loop = asyncio.get_running_loop()
+        for outbox in self._outboxes:
+            outbox.put(("stop",))
+            outbox.close()
+        for conn in self._conns:
+            loop.remove_reader(conn.fileno())
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join)
+        for conn in self._conns:
+            conn.close()
+        self._processes, self._conns, self._outboxes = [], [], []
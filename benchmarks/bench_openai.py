@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from LLMs import async_client
+from mock_openai import start_server
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark complete_many against a local mock OpenAI server")
+    parser.add_argument("--prompts", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated time to first token in seconds")
+    args = parser.parse_args()
+
+    runner, base_url = await start_server(latency=args.latency, tokens_per_second=1000)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "mock-key")
+
+    prompts = [f"Prompt number {i}" for i in range(args.prompts)]
+    try:
+        start = time.perf_counter()
+        results = await async_client.complete_many(prompts, max_concurrency=args.concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        await async_client.close_async_client()
+        await runner.cleanup()
+
+    errors = sum(isinstance(r, Exception) for r in results)
+    print(f"{len(prompts)} completions in {elapsed:.2f}s "
+          f"({len(prompts) / elapsed:.0f}/s, concurrency {args.concurrency}, {errors} errors)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
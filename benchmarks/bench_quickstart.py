@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+from autogen_core import AgentId, SingleThreadedAgentRuntime
+
+# The quickstart modules use flat imports, like the quickstart script itself
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "autogen", "quickstart"))
+
+from agent_modules import Checker, Message, MessageBatch, Modifier, enable_quiet_logging
+
+# Pushes many independent streams through the quickstart Modifier/Checker pipeline.
+# Each stream has its own agent key, so its Checker and Modifier are separate agent
+# instances publishing on their own topic source. With --batch N, N streams share
+# one MessageBatch per hop instead of one Message each.
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(streams: int, start_value: int, batch: int, quiet: bool) -> dict:
+    runtime = SingleThreadedAgentRuntime()
+    latencies = defaultdict(list)
+    values_per_message = max(batch, 1)
+
+    def on_hop(agent_type: str, latency: float) -> None:
+        latencies[agent_type].append(latency)
+
+    await Modifier.register(runtime, "modifier", lambda: Modifier(modify_val=lambda x: x - 1, quiet=quiet, on_hop=on_hop))
+    await Checker.register(runtime, "checker", lambda: Checker(run_until=lambda x: x <= 1, quiet=quiet, on_hop=on_hop))
+
+    runtime.start()
+    start = time.perf_counter()
+    sends = []
+    for key in range(0, streams, values_per_message):
+        count = min(values_per_message, streams - key)
+        if batch:
+            message = MessageBatch(contents=[start_value] * count, sent_at=time.perf_counter())
+        else:
+            message = Message(content=start_value, sent_at=time.perf_counter())
+        sends.append(runtime.send_message(message, AgentId("checker", f"stream-{key}")))
+    await asyncio.gather(*sends)
+    await runtime.stop_when_idle()
+    elapsed = time.perf_counter() - start
+
+    messages = sum(len(samples) for samples in latencies.values())
+    # Every stream visits both agents on each step from start_value down to 1
+    values = streams * (2 * (start_value - 1) + 1) if start_value > 1 else streams
+    hops = {}
+    for agent_type, samples in latencies.items():
+        ordered = sorted(samples)
+        hops[agent_type] = {
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "mean_ms": statistics.fmean(ordered) * 1000,
+        }
+    return {
+        "elapsed": elapsed,
+        "messages": messages,
+        "values": values,
+        "messages_per_second": messages / elapsed,
+        "values_per_second": values / elapsed,
+        "hops": hops,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the quickstart Modifier/Checker pipeline")
+    parser.add_argument("--streams", type=int, default=1000, help="Independent message streams")
+    parser.add_argument("--start", type=int, default=10, help="Starting value of each stream")
+    parser.add_argument("--batch", type=int, default=0, help="Values per MessageBatch (0 sends one Message per value)")
+    parser.add_argument("--verbose", action="store_true", help="Print every hop instead of logging quietly")
+    args = parser.parse_args()
+
+    listener = None
+    if not args.verbose:
+        # Keep the records off the terminal; they still go through the queued, buffered path
+        listener = enable_quiet_logging(logging.NullHandler())
+    try:
+        result = await run(args.streams, args.start, args.batch, quiet=not args.verbose)
+    finally:
+        if listener is not None:
+            listener.stop()
+
+    mode = f"batches of {args.batch}" if args.batch else "single messages"
+    print(f"{args.streams} streams from {args.start} ({mode}): {result['elapsed']:.2f}s")
+    print(f"  {result['messages']} messages, {result['messages_per_second']:.0f} msgs/s, "
+          f"{result['values_per_second']:.0f} values/s")
+    for agent_type, hop in sorted(result["hops"].items()):
+        print(f"  {agent_type:<9} hop latency p50 {hop['p50_ms']:.2f}ms  p95 {hop['p95_ms']:.2f}ms  "
+              f"p99 {hop['p99_ms']:.2f}ms  mean {hop['mean_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
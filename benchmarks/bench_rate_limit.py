@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from openai import AsyncOpenAI
+
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from LLMs import async_client
+from LLMs.rate_limiter import INTERACTIVE, get_rate_limiter, request_priority
+from mock_openai import start_server
+
+# Bursts more requests than the mock server's RPM/TPM allow, once straight through
+# the OpenAI SDK (its own retries only) and once through the shared rate limiter,
+# each against a fresh server. The limiter starts from its defaults and learns the
+# server's limits from the x-ratelimit-* headers. A few interactive requests are
+# sent while the batch is queued, to show them skipping the queue.
+
+
+async def unscheduled(base_url: str, prompts: list, concurrency: int) -> list:
+    client = AsyncOpenAI(api_key="mock-key", base_url=base_url)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(prompt):
+        async with semaphore:
+            response = await client.chat.completions.create(
+                model=async_client.DEFAULT_MODEL, messages=[{"role": "user", "content": prompt}], max_tokens=50)
+            return response.choices[0].message.content
+
+    try:
+        return await asyncio.gather(*(one(prompt) for prompt in prompts), return_exceptions=True)
+    finally:
+        await client.close()
+
+
+async def interactive(count: int, delay: float) -> list:
+    """Latencies of `count` interactive requests sent after `delay` seconds."""
+    await asyncio.sleep(delay)
+
+    async def one(i):
+        start = time.perf_counter()
+        with request_priority(INTERACTIVE):
+            await async_client.complete(f"Interactive question {i}", max_tokens=50)
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(one(i) for i in range(count)))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared rate limiter against a rate-limited mock OpenAI server")
+    parser.add_argument("--prompts", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rpm", type=int, default=300, help="Mock server requests per minute")
+    parser.add_argument("--tpm", type=int, default=15000, help="Mock server tokens per minute")
+    parser.add_argument("--interactive", type=int, default=5, help="Interactive requests sent while the batch runs")
+    parser.add_argument("--interactive-delay", type=float, default=5.0)
+    args = parser.parse_args()
+
+    prompts = [f"Prompt number {i}" for i in range(args.prompts)]
+    os.environ["OPENAI_API_KEY"] = "mock-key"
+
+    def report(name, results, elapsed, stats):
+        errors = sum(isinstance(r, Exception) for r in results)
+        print(f"{name:<18} {len(prompts) - errors:>4} ok {errors:>4} failed in {elapsed:5.1f}s "
+              f"({(len(prompts) - errors) / elapsed:5.1f}/s), {stats['rate_limited']} 429s")
+
+    runner, base_url = await start_server(latency=0.05, tokens_per_second=2000, rpm=args.rpm, tpm=args.tpm)
+    try:
+        start = time.perf_counter()
+        results = await unscheduled(base_url, prompts, args.concurrency)
+        report("SDK retries only", results, time.perf_counter() - start, runner.app["stats"])
+    finally:
+        await runner.cleanup()
+
+    runner, base_url = await start_server(latency=0.05, tokens_per_second=2000, rpm=args.rpm, tpm=args.tpm)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    try:
+        start = time.perf_counter()
+        results, latencies = await asyncio.gather(
+            async_client.complete_many(prompts, max_concurrency=args.concurrency, max_tokens=50),
+            interactive(args.interactive, delay=args.interactive_delay),
+        )
+        elapsed = time.perf_counter() - start
+        report("shared limiter", results, elapsed, runner.app["stats"])
+        if latencies:
+            print(f"interactive requests sent after {args.interactive_delay:.0f}s: "
+                  f"median latency {statistics.median(latencies):.2f}s (batch took {elapsed:.1f}s)")
+        print("limiter:", get_rate_limiter().stats())
+    finally:
+        await async_client.close_async_client()
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main())
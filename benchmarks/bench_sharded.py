@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+from autogen_core import AgentId, SingleThreadedAgentRuntime
+
+# The quickstart modules use flat imports, like the quickstart script itself
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "autogen", "quickstart"))
+
+from agent_modules import Checker, Message, Modifier, enable_quiet_logging
+from sharded_runtime import ShardedAgentRuntime
+
+# Scaling of the quickstart pipeline from 1 to N worker processes. Every stream has
+# its own agent key, so streams are spread over the workers and each stays inside
+# the worker that owns its key.
+
+
+async def run(workers: int, streams: int, start_value: int) -> float:
+    runtime = ShardedAgentRuntime(workers) if workers else SingleThreadedAgentRuntime()
+    await Modifier.register(runtime, "modifier", lambda: Modifier(modify_val=lambda x: x - 1, quiet=True))
+    await Checker.register(runtime, "checker", lambda: Checker(run_until=lambda x: x <= 1, quiet=True))
+    runtime.start()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        runtime.send_message(Message(start_value), AgentId("checker", f"stream-{i}"))
+        for i in range(streams)
+    ])
+    await runtime.stop_when_idle()
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the quickstart pipeline on 1..N worker processes")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--streams", type=int, default=2000, help="Independent message streams")
+    parser.add_argument("--start", type=int, default=10, help="Starting value of each stream")
+    args = parser.parse_args()
+
+    listener = enable_quiet_logging(logging.NullHandler())
+    messages = args.streams * (2 * (args.start - 1) + 1)
+    try:
+        baseline = await run(0, args.streams, args.start)
+        print(f"single-threaded runtime: {baseline:.2f}s, {messages / baseline:.0f} msgs/s")
+        for workers in range(1, args.max_workers + 1):
+            elapsed = await run(workers, args.streams, args.start)
+            print(f"{workers} worker process(es): {elapsed:.2f}s, {messages / elapsed:.0f} msgs/s "
+                  f"({baseline / elapsed:.2f}x single-threaded)")
+    finally:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
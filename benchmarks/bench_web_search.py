@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from urllib.parse import quote_plus
+
+import aiohttp
+
+# Add project root to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import web_search as ws
+from mock_wikipedia import start_server
+
+
+async def baseline_search(query: str) -> str:
+    """The previous implementation: a new session per call and one extract request per title."""
+    async with aiohttp.ClientSession() as session:
+        search_url = f"{ws.WIKIPEDIA_BASE_URL}/w/api.php?action=query&list=search&srsearch={quote_plus(query)}&format=json"
+        async with session.get(search_url) as search_response:
+            search_data = await search_response.json()
+        results = []
+        for result in search_data.get("query", {}).get("search", [])[:2]:
+            title = result.get("title", "")
+            extract_url = f"{ws.WIKIPEDIA_BASE_URL}/w/api.php?action=query&prop=extracts&exintro=1&explaintext=1&titles={quote_plus(title)}&format=json"
+            async with session.get(extract_url) as extract_response:
+                extract_data = await extract_response.json()
+            for page in extract_data.get("query", {}).get("pages", {}).values():
+                results.append(f"# {page.get('title')}\n\n{page.get('extract', '')}")
+        return "\n\n---\n\n".join(results)
+
+
+async def run(search, queries, agents: int) -> float:
+    """Run `queries` through `search` from `agents` concurrent callers, returning mean latency."""
+    latencies = []
+
+    async def agent(agent_queries):
+        for query in agent_queries:
+            start = time.perf_counter()
+            await search(query)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(agent(queries[i::agents]) for i in range(agents)))
+    return sum(latencies) / len(latencies)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark web_search against a local mock Wikipedia server")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated per-request latency in seconds")
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--agents", type=int, default=2, help="Concurrent callers sharing the tool")
+    args = parser.parse_args()
+
+    runner, base_url = await start_server(latency=args.latency)
+    ws.WIKIPEDIA_BASE_URL = base_url
+    queries = [f"benchmark query {i}" for i in range(args.queries)]
+
+    try:
+        baseline = await run(baseline_search, queries, args.agents)
+        pooled = await run(ws.web_search, queries, args.agents)
+    finally:
+        await ws.close_session()
+        await runner.cleanup()
+
+    print(f"{'mode':<12}{'mean latency (ms)':>20}")
+    print(f"{'baseline':<12}{baseline * 1000:>20.1f}")
+    print(f"{'pooled':<12}{pooled * 1000:>20.1f}")
+    print(f"speedup: {baseline / pooled:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
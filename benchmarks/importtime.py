@@ -0,0 +1,163 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from suite import ROOT, git_commit
+
+# Import-time benchmark: how long importing each entry point of the repo takes, from
+# `python -X importtime` in a fresh process. Only the modules the import adds count,
+# not the ones every interpreter loads at startup, and the module bodies' own work
+# (building clients, running an event loop) is part of their time.
+#
+#     python benchmarks/importtime.py                          # results in importtime_results.json
+#     python benchmarks/importtime.py --compare before.json    # exit 1 on a regression
+#
+# A target also fails when it imports one of its `forbidden` packages (the code
+# interpreter must not load crewai or langchain), or when importing it fails; the
+# imports run without OPENAI_API_KEY, so none of them may need credentials.
+
+# name -> (directory put first on sys.path, module, packages it must not import)
+TARGETS = {
+    "interpreter": ("CrewAi", "interpreter", ("crewai", "langchain_core", "langchain_openai", "openai")),
+    "crewai_base": ("CrewAi", "base", ("langchain_openai",)),
+    "quickstart": ("autogen/quickstart", "main", ()),
+    "teams": ("autogen/multiagent", "teams", ()),
+    "tool_usage": ("autogen/multiagent", "tool_usage", ()),
+    "web_search": ("", "tools.web_search", ("openai", "crewai", "autogen_core")),
+    "async_client": ("", "LLMs.async_client", ("crewai", "autogen_core")),
+    "rate_limiter": ("", "LLMs.rate_limiter", ("openai",)),
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def import_times(code: str, cwd: str, env: dict) -> dict:
+    """{module: self time in µs} of everything imported while running `code`."""
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd, env=env,
+                             capture_output=True, text=True)
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"exit code {process.returncode}")
+    times = {}
+    for line in process.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            times[match.group(4)] = times.get(match.group(4), 0) + int(match.group(1))
+    return times
+
+
+def measure(directory: str, module: str, forbidden: tuple, runs: int, env: dict, startup: set) -> dict:
+    cwd = os.path.join(ROOT, directory)
+    code = f"import sys; sys.path.insert(0, {cwd!r}); import {module}"
+    # The first run also writes the .pyc files; it isn't counted
+    import_times(code, cwd, env)
+    samples = []
+    for _ in range(runs):
+        times = {name: us for name, us in import_times(code, cwd, env).items() if name not in startup}
+        samples.append(times)
+
+    totals = [sum(times.values()) / 1000 for times in samples]
+    # Per top-level package, from the median run
+    median_run = sorted(samples, key=lambda times: sum(times.values()))[len(samples) // 2]
+    packages = defaultdict(float)
+    for name, us in median_run.items():
+        packages[name.split(".")[0]] += us / 1000
+    heaviest = dict(sorted(packages.items(), key=lambda item: -item[1])[:5])
+    return {
+        "module": module,
+        "import_ms": statistics.median(totals),
+        "min_ms": min(totals),
+        "modules": len(median_run),
+        "heaviest_ms": {name: round(ms, 1) for name, ms in heaviest.items()},
+        "forbidden_imports": sorted(name for name in packages if name in forbidden),
+    }
+
+
+def format_results(results: dict) -> str:
+    lines = [f"{'target':<14} {'import ms':>10} {'min ms':>8} {'modules':>8}  heaviest packages"]
+    for name, target in results["targets"].items():
+        if "error" in target:
+            lines.append(f"{name:<14} import failed: {target['error'][:80]}")
+            continue
+        heaviest = ", ".join(f"{package} {ms:.0f}" for package, ms in list(target["heaviest_ms"].items())[:3])
+        lines.append(f"{name:<14} {target['import_ms']:>10.1f} {target['min_ms']:>8.1f} {target['modules']:>8}  {heaviest}")
+        if target["forbidden_imports"]:
+            lines.append(f"{'':<14} imports {', '.join(target['forbidden_imports'])}, which it must not")
+    return "\n".join(lines)
+
+
+def regressions(before: dict, after: dict, tolerance: float, min_increase_ms: float) -> list:
+    """Targets whose import time grew by more than `tolerance` and `min_increase_ms` since `before`."""
+    found = []
+    for name, new in after["targets"].items():
+        old = before.get("targets", {}).get(name)
+        if not old or "error" in old or "error" in new:
+            continue
+        increase = new["import_ms"] - old["import_ms"]
+        if increase > min_increase_ms and new["import_ms"] > old["import_ms"] * (1 + tolerance):
+            found.append(f"{name}: {old['import_ms']:.0f}ms -> {new['import_ms']:.0f}ms "
+                         f"({increase / old['import_ms'] * 100:+.0f}%)")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and check the import time of the repo's entry points")
+    parser.add_argument("--targets", default=",".join(TARGETS), help=f"Comma-separated subset of: {', '.join(TARGETS)}")
+    parser.add_argument("--runs", type=int, default=5, help="Timed imports per target; the median is reported")
+    parser.add_argument("--output", default="importtime_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Earlier results JSON; exit 1 if a target got slower")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown against --compare")
+    parser.add_argument("--min-increase-ms", type=float, default=20.0,
+                        help="Slowdowns smaller than this are noise, whatever their relative size")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.targets.split(",") if name.strip()]
+    unknown = [name for name in names if name not in TARGETS]
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(unknown)}")
+
+    env = {key: value for key, value in os.environ.items() if key not in ("OPENAI_API_KEY", "PYTHONPATH")}
+    env["PYTHONPATH"] = ROOT
+    startup = set(import_times("pass", ROOT, env))
+
+    results = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": args.runs,
+        "targets": {},
+    }
+    for name in names:
+        directory, module, forbidden = TARGETS[name]
+        print(f"{name}: import {module}", file=sys.stderr)
+        try:
+            results["targets"][name] = measure(directory, module, forbidden, args.runs, env, startup)
+        except RuntimeError as e:
+            results["targets"][name] = {"module": module, "error": str(e)}
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(format_results(results))
+    print(f"Results written to {args.output}")
+
+    failures = [f"{name}: import failed" for name, target in results["targets"].items() if "error" in target]
+    failures += [f"{name}: imports {', '.join(target['forbidden_imports'])}"
+                 for name, target in results["targets"].items() if target.get("forbidden_imports")]
+    if args.compare:
+        with open(args.compare) as f:
+            failures += regressions(json.load(f), results, args.tolerance, args.min_increase_ms)
+    if failures:
+        print("Import-time check failed:\n" + "\n".join(f"- {failure}" for failure in failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
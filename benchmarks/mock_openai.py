@@ -0,0 +1,245 @@
+import argparse
+import asyncio
+import json
+import time
+from aiohttp import web
+
+# A local stand-in for the OpenAI HTTP API, enough for the chat completion helpers
+# and the agent flows. `latency` is the delay before the first token and
+# `tokens_per_second` the generation rate of the simulated model.
+#
+# Replies are scripted so the agent flows run to completion:
+#   - when the request offers tools and the conversation doesn't end with a tool
+#     result yet, the model calls the first tool, filling its required string
+#     arguments from the last user message
+#   - a system prompt asking for 'APPROVE' (the critic agents) gets it
+#   - a prompt asking for a "Final Answer:" (CrewAI's ReAct format) gets one
+#
+# With `rpm` / `tpm`, chat completions are rate limited like the real API: every
+# response carries x-ratelimit-* headers and requests over the limit get a 429.
+
+
+def _text(content) -> str:
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content or "")
+
+
+def _tool_call(body: dict, call_id: str):
+    """The scripted tool call for `body`, or None when the model should answer in text."""
+    messages = body.get("messages") or []
+    if not body.get("tools") or (messages and messages[-1].get("role") == "tool"):
+        return None
+    function = body["tools"][0]["function"]
+    parameters = function.get("parameters") or {}
+    user = next((_text(m.get("content")) for m in reversed(messages) if m.get("role") == "user"), "")
+    query = " ".join(user.split()[:8]) or "benchmark"
+    arguments = {
+        name: query
+        for name, schema in (parameters.get("properties") or {}).items()
+        if name in parameters.get("required", []) and schema.get("type", "string") == "string"
+    }
+    return {"id": call_id, "type": "function", "function": {"name": function["name"], "arguments": json.dumps(arguments)}}
+
+
+class _Limit:
+    """Per-minute budget refilled continuously, as the API enforces it."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self.remaining = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.remaining = min(self.per_minute, self.remaining + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def reset_after(self, amount: float) -> float:
+        return max(0.0, amount - self.remaining) * 60 / self.per_minute
+
+
+def create_app(latency: float = 0.2, tokens_per_second: float = 200.0, completion_tokens: int = 50,
+               rpm: int = None, tpm: int = None) -> web.Application:
+    """Build the mock OpenAI application."""
+    stats = {"requests": 0, "rate_limited": 0}
+    requests_limit = _Limit(rpm) if rpm else None
+    tokens_limit = _Limit(tpm) if tpm else None
+
+    def rate_limit(body: dict) -> tuple:
+        """(headers, whether the request is over the limit); counts it against the limits if not."""
+        if requests_limit is None and tokens_limit is None:
+            return {}, False
+        # The API counts the prompt (~4 characters a token) plus max_tokens when the request arrives
+        cost = sum(len(_text(m.get("content"))) // 4 for m in body.get("messages", []))
+        cost += body.get("max_tokens") or body.get("max_completion_tokens") or completion_tokens
+        limits = [(limit, amount, name) for limit, amount, name in
+                  ((requests_limit, 1, "requests"), (tokens_limit, cost, "tokens")) if limit is not None]
+        for limit, _, _ in limits:
+            limit.refill()
+        wait = max(limit.reset_after(amount) for limit, amount, _ in limits)
+        if wait == 0:
+            for limit, amount, _ in limits:
+                limit.remaining -= amount
+        headers = {}
+        for limit, amount, name in limits:
+            headers[f"x-ratelimit-limit-{name}"] = str(limit.per_minute)
+            headers[f"x-ratelimit-remaining-{name}"] = str(max(0, int(limit.remaining)))
+            headers[f"x-ratelimit-reset-{name}"] = f"{int(limit.reset_after(amount) * 1000)}ms"
+        if wait:
+            headers["retry-after-ms"] = str(int(wait * 1000) + 1)
+        return headers, wait > 0
+
+    def completion_text(body: dict) -> list:
+        messages = body.get("messages") or []
+        prompt = _text(messages[-1].get("content")) if messages else ""
+        tokens = min(completion_tokens, body.get("max_tokens") or body.get("max_completion_tokens") or completion_tokens)
+        text = [f"tok{i}({len(prompt)}) " for i in range(tokens)]
+        prompts = " ".join(_text(m.get("content")) for m in messages)
+        if "Final Answer:" in prompts:
+            text = ["Thought: I now know the final answer\nFinal Answer: "] + text
+        if any(m.get("role") == "system" and "APPROVE" in _text(m.get("content")) for m in messages):
+            text.append("APPROVE")
+        return text
+
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        stats["requests"] += 1
+        body = await request.json()
+        headers, limited = rate_limit(body)
+        if limited:
+            stats["rate_limited"] += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429,
+                headers=headers,
+            )
+        tool_call = _tool_call(body, f"call_mock_{stats['requests']}")
+        tokens = [] if tool_call else completion_text(body)
+        finish_reason = "tool_calls" if tool_call else "stop"
+        prompt_tokens = sum(len(_text(m.get("content")).split()) for m in body.get("messages", []))
+        completion_count = len(tokens) or 10
+        created = int(time.time())
+        await asyncio.sleep(latency)
+
+        if not body.get("stream"):
+            await asyncio.sleep(completion_count / tokens_per_second)
+            message = {"role": "assistant", "content": "".join(tokens) or None}
+            if tool_call:
+                message["tool_calls"] = [tool_call]
+            return web.json_response({
+                "id": f"chatcmpl-mock-{stats['requests']}",
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": finish_reason,
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_count,
+                    "total_tokens": prompt_tokens + completion_count,
+                },
+            }, headers=headers)
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", **headers})
+        await response.prepare(request)
+        for token in tokens:
+            chunk = {
+                "id": f"chatcmpl-mock-{stats['requests']}",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(1 / tokens_per_second)
+        if tool_call:
+            await asyncio.sleep(completion_count / tokens_per_second)
+            delta = {"role": "assistant", "tool_calls": [dict(tool_call, index=0)]}
+            chunk = {
+                "id": f"chatcmpl-mock-{stats['requests']}",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        done = {
+            "id": f"chatcmpl-mock-{stats['requests']}",
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+        }
+        await response.write(f"data: {json.dumps(done)}\n\n".encode())
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage = dict(done, choices=[], usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_count,
+                "total_tokens": prompt_tokens + completion_count,
+            })
+            await response.write(f"data: {json.dumps(usage)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def speech(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        body = await request.json()
+        await asyncio.sleep(latency)
+        # Fake audio: ~1KB per 100 characters of input
+        frame = f"[{body.get('voice', 'mock')}:{len(body.get('input', ''))}]".encode()
+        audio = frame * max(1, len(body.get("input", "")) * 10 // len(frame))
+        return web.Response(body=audio, content_type="audio/mpeg")
+
+    async def transcriptions(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        form = await request.post()
+        audio = form["file"].file.read()
+        await asyncio.sleep(latency)
+        # Pretend every 16KB of audio is one second containing one sentence
+        duration = len(audio) / 16000
+        segments = [
+            {"id": i, "start": float(i), "end": min(float(i + 1), duration), "text": f" Second {i}."}
+            for i in range(int(duration) + (duration % 1 > 0))
+        ]
+        return web.json_response({
+            "task": "transcribe",
+            "language": "english",
+            "duration": duration,
+            "text": "".join(s["text"] for s in segments).strip(),
+            "segments": segments,
+        })
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/v1/audio/speech", speech)
+    app.router.add_post("/v1/audio/transcriptions", transcriptions)
+    return app
+
+
+async def start_server(latency: float = 0.2, tokens_per_second: float = 200.0, host: str = "127.0.0.1", port: int = 0,
+                       completion_tokens: int = 50, rpm: int = None, tpm: int = None):
+    """Start the mock server in the running loop, returning (runner, base_url)."""
+    runner = web.AppRunner(create_app(latency, tokens_per_second, completion_tokens, rpm, tpm))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the mock OpenAI API")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.2, help="Delay before the first token in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--completion-tokens", type=int, default=50)
+    parser.add_argument("--rpm", type=int, help="Requests per minute before answering 429")
+    parser.add_argument("--tpm", type=int, help="Tokens per minute before answering 429")
+    args = parser.parse_args()
+    app = create_app(args.latency, args.tokens_per_second, args.completion_tokens, args.rpm, args.tpm)
+    web.run_app(app, host="127.0.0.1", port=args.port)
@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+from aiohttp import web
+
+# A local stand-in for the parts of the Wikipedia API used by tools.web_search.
+# Every request sleeps for `latency` seconds to simulate a network round-trip.
+
+ARTICLE_COUNT = 200
+
+
+def _article(i: int) -> dict:
+    return {
+        "title": f"Article {i}",
+        "snippet": f"Snippet for <span class=\"searchmatch\">article</span> {i}",
+        "extract": f"Article {i} is a made-up page used for benchmarking. " * 20,
+    }
+
+
+ARTICLES = {a["title"]: a for a in (_article(i) for i in range(ARTICLE_COUNT))}
+
+
+def create_app(latency: float = 0.05) -> web.Application:
+    """Build the mock Wikipedia application."""
+    stats = {"requests": 0}
+
+    async def api(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        await asyncio.sleep(latency)
+        params = request.query
+
+        if params.get("list") == "search":
+            # Deterministically map a query to a handful of articles
+            start = sum(map(ord, params.get("srsearch", ""))) % (ARTICLE_COUNT - 10)
+            hits = [{"title": f"Article {i}", "snippet": ARTICLES[f"Article {i}"]["snippet"]}
+                    for i in range(start, start + 10)]
+            return web.json_response({"query": {"search": hits}})
+
+        if params.get("prop") == "extracts":
+            pages = {}
+            for n, title in enumerate(params.get("titles", "").split("|")):
+                article = ARTICLES.get(title)
+                if article:
+                    pages[str(n)] = {"title": title, "extract": article["extract"]}
+                else:
+                    pages[str(-n - 1)] = {"title": title, "missing": ""}
+            return web.json_response({"query": {"pages": pages}})
+
+        return web.json_response({"error": "unsupported"}, status=400)
+
+    async def summary(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        await asyncio.sleep(latency)
+        article = ARTICLES.get(request.match_info["title"])
+        if not article:
+            return web.json_response({"title": "Not found"}, status=404)
+        return web.json_response({
+            "title": article["title"],
+            "extract": article["extract"],
+            "content_urls": {"desktop": {"page": f"/wiki/{article['title']}"}},
+        })
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_get("/w/api.php", api)
+    app.router.add_get("/api/rest_v1/page/summary/{title}", summary)
+    return app
+
+
+async def start_server(latency: float = 0.05, host: str = "127.0.0.1", port: int = 0):
+    """Start the mock server in the running loop, returning (runner, base_url)."""
+    runner = web.AppRunner(create_app(latency))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the mock Wikipedia API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Per-request latency in seconds")
+    args = parser.parse_args()
+    web.run_app(create_app(args.latency), host="127.0.0.1", port=args.port)
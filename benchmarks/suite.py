@@ -0,0 +1,389 @@
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import platform
+import runpy
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+# Offline benchmark suite: every flow of the repo against local stand-ins for the
+# OpenAI and Wikipedia APIs (mock_openai.py, mock_wikipedia.py), which run in their
+# own processes so they don't share the CPU or the memory accounting with the flows.
+#
+#     python benchmarks/suite.py                       # all flows, results in benchmark_results.json
+#     python benchmarks/suite.py --flows web_search,teams --output after.json --compare before.json
+#
+# For each flow it reports throughput, p50/p95/p99 latency and the peak Python heap
+# (tracemalloc, measured in a separate pass so it doesn't slow the timed one).
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS_DIR)
+
+# The agent scripts use flat imports from their own directories
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "autogen", "multiagent"))
+sys.path.append(os.path.join(ROOT, "CrewAi"))
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock(script: str, *args) -> tuple:
+    """Run a mock server script in its own process; return (process, port) once it accepts connections."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCHMARKS_DIR, script), "--port", str(port), *map(str, args)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{script} exited with code {process.returncode}")
+        with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", port), timeout=0.5):
+            return process, port
+        time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"{script} did not start listening on port {port}")
+
+
+# Flows. Each one does its setup and returns (op, cleanup): `op(i)` runs one
+# iteration, as a coroutine function (run concurrently in one event loop) or a
+# plain function (run on a thread pool); `cleanup` may be None, sync or async.
+
+def web_search_flow():
+    from tools import web_search as ws
+    from tools.cache import MemoryCache, TieredCache
+
+    ws.WIKIPEDIA_BASE_URL = os.environ["WIKIPEDIA_BASE_URL"]
+    # Start every pass cold; distinct queries still share extracts, as in real use
+    ws.cache = TieredCache(MemoryCache(max_bytes=ws.CACHE_MAX_BYTES, ttl=ws.CACHE_TTL))
+
+    async def op(i):
+        return await ws.web_search(f"benchmark query {i}")
+
+    return op, ws.close_session
+
+
+def web_search_local_flow():
+    """web_search answered from a local index of the mock Wikipedia's pages."""
+    from mock_wikipedia import ARTICLE_COUNT, ARTICLES
+    from tools import web_search as ws
+    from tools.local_index import LocalIndex
+
+    directory = tempfile.mkdtemp()
+    index = LocalIndex(os.path.join(directory, "index.sqlite"), create=True)
+    index.add_documents({"title": a["title"], "extract": a["extract"], "url": f"/wiki/{a['title']}"} for a in ARTICLES.values())
+    ws.set_local_index(index)
+
+    async def op(i):
+        return await ws.web_search(f"Article {i % ARTICLE_COUNT}")
+
+    async def cleanup():
+        ws.set_local_index(None)
+        index.close()
+        shutil.rmtree(directory, ignore_errors=True)
+        await ws.close_session()
+
+    return op, cleanup
+
+
+def openai_completion_flow():
+    from LLMs import Openai
+
+    def op(i):
+        return Openai.create_chat_completion(
+            model="gpt-3.5-turbo",
+            messages=Openai._text_messages(f"Write a short poem about technology #{i}.", "You are a helpful assistant."),
+            max_tokens=150,
+        )
+
+    return op, None
+
+
+def openai_stream_flow():
+    from LLMs import Openai
+
+    def op(i):
+        completion = Openai.stream_text_completion(f"Write a short poem about technology #{i}.")
+        for _ in completion:
+            pass
+        return completion.metrics
+
+    return op, None
+
+
+def async_completion_flow():
+    from LLMs import async_client
+
+    async def op(i):
+        return await async_client.complete(f"Write a short poem about technology #{i}.")
+
+    return op, async_client.close_async_client
+
+
+def script_flow(path: str):
+    """Run a whole agent script, as `python <path>` would, once per iteration."""
+    def setup():
+        from tools import web_search as ws
+
+        ws.WIKIPEDIA_BASE_URL = os.environ["WIKIPEDIA_BASE_URL"]
+
+        def op(i):
+            runpy.run_path(os.path.join(ROOT, path), run_name="__main__")
+
+        return op, None
+    return setup
+
+
+def market_research_flow():
+    import base
+
+    def op(i):
+        return base.MarketResearchCrew().run_market_research("Artificial Intelligence in Healthcare")
+
+    return op, None
+
+
+# name -> (setup, default iterations, default concurrency)
+FLOWS = {
+    "web_search": (web_search_flow, 200, 8),
+    "web_search_local": (web_search_local_flow, 200, 8),
+    "openai_completion": (openai_completion_flow, 100, 8),
+    "openai_stream": (openai_stream_flow, 100, 8),
+    "async_completion": (async_completion_flow, 200, 32),
+    "teams": (script_flow("autogen/multiagent/teams.py"), 5, 1),
+    "tool_usage": (script_flow("autogen/multiagent/tool_usage.py"), 5, 1),
+    "market_research_crew": (market_research_flow, 1, 1),
+}
+
+
+async def _run_async(op, iterations: int, concurrency: int) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await op(i)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    return latencies, errors
+
+
+def _run_sync(op, iterations: int, concurrency: int) -> tuple:
+    latencies, errors = [], []
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            op(i)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        else:
+            latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(iterations)))
+    return latencies, errors
+
+
+def run_pass(setup, iterations: int, concurrency: int) -> tuple:
+    """Set the flow up, run `iterations` of it; return (latencies, errors, elapsed seconds)."""
+    op, cleanup = setup()
+    start = time.perf_counter()
+    try:
+        if asyncio.iscoroutinefunction(op):
+            async def run():
+                try:
+                    return await _run_async(op, iterations, concurrency)
+                finally:
+                    # Async resources are bound to this loop
+                    if cleanup is not None:
+                        await cleanup()
+            latencies, errors = asyncio.run(run())
+        else:
+            latencies, errors = _run_sync(op, iterations, concurrency)
+            if cleanup is not None:
+                cleanup()
+    finally:
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def measure(name: str, iterations: int, concurrency: int, warmup: int = 1, memory: bool = True) -> dict:
+    setup = FLOWS[name][0]
+    if warmup:
+        # Imports, connection pools and lazily created clients
+        run_pass(setup, warmup, min(concurrency, warmup))
+
+    latencies, errors, elapsed = run_pass(setup, iterations, concurrency)
+    latencies.sort()
+    result = {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "elapsed_s": elapsed,
+        "throughput_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": (latencies[-1] if latencies else 0.0) * 1000,
+        },
+    }
+    if errors:
+        result["first_error"] = errors[0][:500]
+
+    if memory:
+        tracemalloc.start()
+        try:
+            run_pass(setup, iterations, concurrency)
+            result["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_results(results: dict) -> str:
+    lines = [f"{'flow':<22} {'iters':>5} {'conc':>4} {'ops/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+             f"{'p99 ms':>9} {'peak MB':>8} {'errors':>6}"]
+    for name, flow in results["flows"].items():
+        if "setup_error" in flow:
+            lines.append(f"{name:<22} setup failed: {flow['setup_error'][:80]}")
+            continue
+        latency = flow["latency_ms"]
+        peak = f"{flow['peak_memory_mb']:.1f}" if "peak_memory_mb" in flow else "-"
+        lines.append(
+            f"{name:<22} {flow['iterations']:>5} {flow['concurrency']:>4} {flow['throughput_per_s']:>8.1f} "
+            f"{latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f} {peak:>8} {flow['errors']:>6}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(before: dict, after: dict) -> str:
+    """Throughput, p95 and peak memory of `after` relative to `before` for the flows both ran."""
+    lines = [f"{'flow':<22} {'ops/s':>16} {'p95 ms':>20} {'peak MB':>16}"]
+    for name, new in after["flows"].items():
+        old = before.get("flows", {}).get(name)
+        if not old or "setup_error" in old or "setup_error" in new:
+            continue
+
+        def change(a, b):
+            return f"{(b / a - 1) * 100:+.0f}%" if a else "n/a"
+
+        ops = f"{change(old['throughput_per_s'], new['throughput_per_s'])}"
+        p95 = f"{change(old['latency_ms']['p95'], new['latency_ms']['p95'])}"
+        peak = change(old.get("peak_memory_mb"), new["peak_memory_mb"]) if "peak_memory_mb" in new else "n/a"
+        lines.append(f"{name:<22} {ops:>16} {p95:>20} {peak:>16}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the repo's flows against local mock OpenAI and Wikipedia servers")
+    parser.add_argument("--flows", default=",".join(FLOWS), help=f"Comma-separated subset of: {', '.join(FLOWS)}")
+    parser.add_argument("--iterations", type=int, help="Iterations per flow (default: per flow)")
+    parser.add_argument("--concurrency", type=int, help="Concurrent iterations (default: per flow)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed iterations before each flow")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Mock model time to first token in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Mock model generation rate")
+    parser.add_argument("--completion-tokens", type=int, default=50, help="Tokens per mock completion")
+    parser.add_argument("--wiki-latency", type=float, default=0.05, help="Mock Wikipedia per-request latency in seconds")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Show the flows' own output")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.flows.split(",") if name.strip()]
+    unknown = [name for name in names if name not in FLOWS]
+    if unknown:
+        parser.error(f"unknown flows: {', '.join(unknown)}")
+
+    llm, llm_port = start_mock("mock_openai.py", "--latency", args.llm_latency, "--tokens-per-second",
+                               args.tokens_per_second, "--completion-tokens", args.completion_tokens)
+    wiki, wiki_port = start_mock("mock_wikipedia.py", "--latency", args.wiki_latency)
+    # Set before the flows import anything, so the clients they create point at the mocks
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{llm_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "mock-key"
+    os.environ["WIKIPEDIA_BASE_URL"] = f"http://127.0.0.1:{wiki_port}"
+    os.environ["LLM_CACHE_MODE"] = "off"
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+    results = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "mock": {
+            "llm_latency_s": args.llm_latency,
+            "tokens_per_second": args.tokens_per_second,
+            "completion_tokens": args.completion_tokens,
+            "wiki_latency_s": args.wiki_latency,
+        },
+        "flows": {},
+    }
+    devnull = open(os.devnull, "w")
+    try:
+        for name in names:
+            _, iterations, concurrency = FLOWS[name]
+            iterations = args.iterations or iterations
+            concurrency = args.concurrency or concurrency
+            print(f"{name}: {iterations} iterations, concurrency {concurrency}", file=sys.stderr)
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)
+            try:
+                with output:
+                    results["flows"][name] = measure(name, iterations, concurrency, args.warmup, not args.no_memory)
+            except Exception as e:
+                # A flow whose dependencies are missing or broken doesn't stop the others
+                results["flows"][name] = {"setup_error": f"{type(e).__name__}: {e}"}
+    finally:
+        devnull.close()
+        llm.terminate()
+        wiki.terminate()
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(format_results(results))
+    print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print(format_comparison(json.load(f), results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Two-tier cache used by the search tools: a bounded in-process LRU in front of
+# an optional SQLite store that survives restarts. Values must be JSON-serializable.
+
+
+class _FetchAbandoned(Exception):
+    """Set on an in-flight load whose owner was cancelled; its waiters load the key themselves."""
+
+
+class MemoryCache:
+    """In-process LRU cache with a TTL and a size bound in bytes."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 3600):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.size -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, size: int = None) -> None:
+        if size is None:
+            size = len(json.dumps(value).encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self.size += size
+            # Evict least recently used entries until we are back under the bound
+            while self.size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """SQLite-backed cache tier that persists across restarts."""
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + self.ttl),
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows, returning how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """Memory tier in front of an optional disk tier, with single-flight loading."""
+
+    def __init__(self, memory: MemoryCache = None, disk: DiskCache = None):
+        self.memory = memory if memory is not None else MemoryCache()
+        self.disk = disk
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "merged": 0}
+        self._inflight = {}
+
+    async def get(self, key: str):
+        value = self.memory.get(key)
+        if value is not None:
+            self.counters["memory_hits"] += 1
+            return value
+        if self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.counters["disk_hits"] += 1
+                self.memory.set(key, value)
+                return value
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, value) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+    def get_sync(self, key: str):
+        """Blocking version of `get` for callers outside an event loop."""
+        value = self.memory.get(key)
+        if value is not None:
+            self.counters["memory_hits"] += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.counters["disk_hits"] += 1
+                self.memory.set(key, value)
+                return value
+        self.counters["misses"] += 1
+        return None
+
+    def set_sync(self, key: str, value) -> None:
+        """Blocking version of `set` for callers outside an event loop."""
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    async def get_or_fetch(self, key: str, fetch):
+        """Return the cached value for `key`, calling `fetch()` on a miss.
+
+        Concurrent misses on the same key share a single `fetch()` call.
+        `None` results are returned but never cached.
+        """
+        async def fetch_one(keys):
+            return {key: await fetch()}
+
+        results = await self.get_or_fetch_many([key], fetch_one)
+        return results[key]
+
+    async def get_or_fetch_many(self, keys: list, fetch_many) -> dict:
+        """Look up several keys, loading all misses with one `fetch_many(missing_keys)` call.
+
+        `fetch_many` must return a dict of key -> value. Keys already being loaded by
+        another caller are awaited instead of fetched again; if that caller is
+        cancelled, the waiters load them with their own `fetch_many`.
+        """
+        results = {}
+        candidates = []
+        for key in keys:
+            value = await self.get(key)
+            if value is not None:
+                results[key] = value
+            else:
+                candidates.append(key)
+
+        # Claim the keys nobody else is loading; no awaits between check and claim
+        loop = asyncio.get_running_loop()
+        waiting = {}
+        claimed = {}
+        for key in candidates:
+            if key in self._inflight:
+                self.counters["merged"] += 1
+                waiting[key] = self._inflight[key]
+            elif key not in claimed:
+                claimed[key] = self._inflight[key] = loop.create_future()
+
+        if claimed:
+            try:
+                fetched = await fetch_many(list(claimed))
+                for key, future in claimed.items():
+                    value = fetched.get(key)
+                    if value is not None:
+                        await self.set(key, value)
+                    results[key] = value
+                    future.set_result(value)
+            except asyncio.CancelledError:
+                # Cancelling the futures would cancel the waiters too; hand the keys over to them
+                for future in claimed.values():
+                    if not future.done():
+                        future.set_exception(_FetchAbandoned())
+                        future.exception()
+                raise
+            except Exception as e:
+                for future in claimed.values():
+                    if not future.done():
+                        future.set_exception(e)
+                        # Mark the exception as retrieved when no other caller is waiting on it
+                        future.exception()
+                raise
+            finally:
+                for key in claimed:
+                    del self._inflight[key]
+
+        abandoned = []
+        for key, future in waiting.items():
+            try:
+                results[key] = await asyncio.shield(future)
+            except _FetchAbandoned:
+                abandoned.append(key)
+        if abandoned:
+            results.update(await self.get_or_fetch_many(abandoned, fetch_many))
+        return results
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters plus the current memory tier size."""
+        return {
+            **self.counters,
+            "evictions": self.memory.evictions,
+            "entries": len(self.memory),
+            "bytes": self.memory.size,
+        }
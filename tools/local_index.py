@@ -0,0 +1,263 @@
+import argparse
+import bz2
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+# Local full-text index for web_search, backed by SQLite FTS5 with BM25 ranking.
+#
+# Build it once from a Wikipedia abstracts dump (enwiki-latest-abstract.xml.gz from
+# https://dumps.wikimedia.org/enwiki/latest/) or a JSONL corpus of
+# {"title", "extract" or "text", "url"} lines:
+#
+#     python -m tools.local_index build enwiki-latest-abstract.xml.gz --index wiki.sqlite
+#     python -m tools.local_index search "Corrine Tellado" --index wiki.sqlite
+#
+# then set WEB_SEARCH_INDEX_PATH=wiki.sqlite. The dump is streamed and written in
+# batches, so memory stays bounded whatever its size; an interrupted build picks up
+# where it stopped, and running it again with a newer dump updates pages in place.
+
+BATCH_SIZE = 5000
+
+# Dropped from queries, so "Who is X?" matches pages about X rather than requiring "who" and "is"
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have how in is it of on or that the "
+    "this to was were what when where which who whom why will with".split()
+)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (id INTEGER PRIMARY KEY, title TEXT NOT NULL UNIQUE, extract TEXT NOT NULL, url TEXT NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(title, extract, content='pages', content_rowid='id', tokenize='porter unicode61');
+CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts(rowid, title, extract) VALUES (new.id, new.title, new.extract);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, title, extract) VALUES ('delete', old.id, old.title, old.extract);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, title, extract) VALUES ('delete', old.id, old.title, old.extract);
+    INSERT INTO pages_fts(rowid, title, extract) VALUES (new.id, new.title, new.extract);
+END;
+CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, signature TEXT NOT NULL, documents INTEGER NOT NULL);
+"""
+
+# Pages are keyed by title; a page seen again is only rewritten if it changed
+_UPSERT = (
+    "INSERT INTO pages (title, extract, url) VALUES (?, ?, ?) "
+    "ON CONFLICT(title) DO UPDATE SET extract = excluded.extract, url = excluded.url "
+    "WHERE extract != excluded.extract OR url != excluded.url"
+)
+
+
+def match_expression(query: str) -> Optional[str]:
+    """FTS5 expression requiring every meaningful word of `query`, or None if there is none."""
+    words = [word for word in _TOKEN.findall(query.casefold()) if word not in STOPWORDS]
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in dict.fromkeys(words))
+
+
+class LocalIndex:
+    """SQLite FTS5 index of page titles and extracts.
+
+    `search` is safe to call from several threads; build with one writer at a time.
+    An existing index is opened read-only; with `create`, it is opened for writing
+    and created if missing.
+    """
+
+    def __init__(self, path: str, create: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        if not create:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No local index at {path}; build it with `python -m tools.local_index build`")
+            self._conn = sqlite3.connect(f"{Path(path).absolute().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            return
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def search(self, query: str, limit: int = 2) -> List[dict]:
+        """Best matches for `query` as [{"title", "extract", "url"}].
+
+        Pages whose title has every word come first; the rest of `limit` is filled
+        from pages that have them anywhere. Title postings are much shorter than
+        text postings, so queries naming a page stay fast on large dumps.
+        """
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        sql = ("SELECT p.title, p.extract, p.url FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid "
+               "WHERE pages_fts MATCH ? ORDER BY bm25(pages_fts, 10.0, 1.0) LIMIT ?")
+        with self._lock:
+            rows = self._conn.execute(sql, (f"{{title}}: ({expression})", limit)).fetchall()
+            if len(rows) < limit:
+                seen = {row[0] for row in rows}
+                rows += [row for row in self._conn.execute(sql, (expression, limit)).fetchall() if row[0] not in seen]
+        return [{"title": title, "extract": extract, "url": url} for title, extract, url in rows[:limit]]
+
+    def add_documents(self, documents: Iterable[dict], batch_size: int = BATCH_SIZE) -> int:
+        """Insert or update pages ({"title", "extract", "url"}), committing every `batch_size`."""
+        count = 0
+        batch = []
+        for document in documents:
+            batch.append((document["title"], document["extract"], document.get("url", "")))
+            if len(batch) >= batch_size:
+                count += self._write(batch)
+                batch = []
+        if batch:
+            count += self._write(batch)
+        return count
+
+    def _write(self, batch: list, checkpoint: tuple = None) -> int:
+        with self._lock:
+            self._conn.executemany(_UPSERT, batch)
+            if checkpoint is not None:
+                # The pages and the position in their source are committed together
+                self._conn.execute("INSERT OR REPLACE INTO sources (path, signature, documents) VALUES (?, ?, ?)", checkpoint)
+            self._conn.commit()
+        return len(batch)
+
+    def build(self, source: str, batch_size: int = BATCH_SIZE, progress=None) -> int:
+        """Stream `source` (abstracts XML or JSONL, optionally .gz/.bz2) into the index.
+
+        Progress is committed with every batch, so calling this again after an
+        interruption skips the documents already indexed. A changed source file
+        (size or modification time) is indexed from the start. Returns the number of
+        documents written by this call.
+        """
+        source_key = os.path.abspath(source)
+        stat = os.stat(source)
+        signature = f"{stat.st_size}:{int(stat.st_mtime)}"
+        with self._lock:
+            row = self._conn.execute("SELECT signature, documents FROM sources WHERE path = ?", (source_key,)).fetchone()
+        done = row[1] if row and row[0] == signature else 0
+
+        written = 0
+        batch = []
+        position = 0
+        for document in read_documents(source):
+            position += 1
+            if position <= done:
+                continue
+            batch.append((document["title"], document["extract"], document.get("url", "")))
+            if len(batch) >= batch_size:
+                written += self._write(batch, (source_key, signature, position))
+                batch = []
+                if progress:
+                    progress(position)
+        if batch:
+            written += self._write(batch, (source_key, signature, position))
+        return written
+
+    def optimize(self) -> None:
+        """Merge the index segments; worth running once after a large build."""
+        with self._lock:
+            self._conn.execute("INSERT INTO pages_fts(pages_fts) VALUES ('optimize')")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _open(path: str, mode: str = "rb"):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+    if path.endswith(".bz2"):
+        return bz2.open(path, mode)
+    return open(path, mode)
+
+
+def read_documents(source: str) -> Iterator[dict]:
+    """Stream {"title", "extract", "url"} from an abstracts XML dump or a JSONL file."""
+    name = source[:-3] if source.endswith(".gz") else source[:-4] if source.endswith(".bz2") else source
+    if name.endswith(".xml"):
+        yield from _read_abstracts(source)
+    else:
+        yield from _read_jsonl(source)
+
+
+def _read_abstracts(source: str) -> Iterator[dict]:
+    """Pages of a Wikipedia abstracts dump (<doc><title>Wikipedia: X</title><url/><abstract/>...)."""
+    with _open(source) as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        for event, element in context:
+            if event != "end" or element.tag != "doc":
+                continue
+            title = (element.findtext("title") or "").removeprefix("Wikipedia: ").strip()
+            extract = (element.findtext("abstract") or "").strip()
+            url = (element.findtext("url") or "").strip()
+            # Parsed elements are dropped as we go, so memory doesn't grow with the dump
+            root.clear()
+            if title and extract:
+                yield {"title": title, "extract": extract, "url": url}
+
+
+def _read_jsonl(source: str) -> Iterator[dict]:
+    with _open(source, "rt") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            title = record.get("title", "").strip()
+            extract = (record.get("extract") or record.get("text") or "").strip()
+            if title and extract:
+                yield {"title": title, "extract": extract, "url": record.get("url", "")}
+
+
+def main():
+    # Shared by the subcommands, so --index goes after the command as in the usage above
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--index", default=os.getenv("WEB_SEARCH_INDEX_PATH", "wiki.sqlite"), help="Index file")
+    parser = argparse.ArgumentParser(description="Build or query the local web_search index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", parents=[common], help="Add a dump (abstracts .xml[.gz|.bz2] or .jsonl[.gz|.bz2]) to the index")
+    build.add_argument("source")
+    build.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    search = commands.add_parser("search", parents=[common], help="Show the top matches for a query")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=2)
+    args = parser.parse_args()
+
+    try:
+        index = LocalIndex(args.index, create=args.command == "build")
+    except FileNotFoundError as e:
+        parser.exit(1, f"{e}\n")
+    try:
+        if args.command == "build":
+            start = time.perf_counter()
+            written = index.build(args.source, args.batch_size,
+                                  progress=lambda n: print(f"\r{n} documents", end="", file=sys.stderr, flush=True))
+            index.optimize()
+            print(f"\nIndexed {written} documents in {time.perf_counter() - start:.1f}s; "
+                  f"{len(index)} pages in {args.index}", file=sys.stderr)
+        else:
+            start = time.perf_counter()
+            hits = index.search(args.query, args.limit)
+            elapsed = time.perf_counter() - start
+            for hit in hits:
+                print(f"# {hit['title']}\n\n{hit['extract']}\n\nSource: {hit['url']}\n")
+            print(f"{len(hits)} hits in {elapsed * 1000:.1f}ms", file=sys.stderr)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
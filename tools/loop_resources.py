@@ -0,0 +1,40 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable
+
+# Cleanup for the process-wide clients that belong to one event loop (the search
+# session in web_search.py, the AsyncOpenAI client in LLMs/async_client.py). They
+# are rebuilt when the running loop changes, as it does with every asyncio.run();
+# these helpers close the old one instead of leaving its connections open.
+
+
+async def _close_when_finalized(close: Callable[[], Awaitable]) -> AsyncIterator[None]:
+    try:
+        yield
+    finally:
+        await close()
+
+
+def close_at_loop_shutdown(close: Callable[[], Awaitable]) -> object:
+    """Run `await close()` when the running loop shuts down its async generators.
+
+    asyncio.run() does that after the main coroutine returns and before the loop
+    closes, so the resource is closed on its own loop. Keep a reference to the
+    returned handle for as long as the resource is in use.
+    """
+    closer = _close_when_finalized(close)
+    # Step the generator to its yield, which registers it with the running loop
+    try:
+        closer.asend(None).send(None)
+    except StopIteration:
+        pass
+    return closer
+
+
+def close_on_loop(close: Callable[[], Awaitable], loop: asyncio.AbstractEventLoop) -> None:
+    """Close a resource bound to `loop`, another loop than the running one.
+
+    A loop still running in another thread closes it itself. A closed loop already
+    did at shutdown (see `close_at_loop_shutdown`), or can't anymore.
+    """
+    if loop.is_running() and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(close(), loop)
@@ -0,0 +1,337 @@
+import asyncio
+import atexit
+import contextvars
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+# Lightweight tracing for the model calls, tools and agent turns of a run.
+#
+#     with tracer.span("web_search", kind="tool", request_bytes=len(query)) as span:
+#         ...
+#         span.set(response_bytes=len(result), cache_hits=1)
+#
+# Spans nest through a context variable, so a tool called during an agent turn
+# becomes its child. A span kept open across `yield` is opened with activate=False
+# and made current with `tracer.activated(span)` between yields only. Tracing is off (and `span` costs next to nothing) unless
+# TRACE_PATH is set or `tracer.enable()` is called:
+#   - TRACE_PATH=trace.jsonl writes one JSON span per line as spans finish
+#   - TRACE_PATH=trace.json writes a Chrome trace (chrome://tracing, Perfetto) at exit
+# `tracer.format_summary()` (or `python -m tools.tracing trace.jsonl`) shows where
+# the wall-clock time went.
+
+TRACE_PATH = os.getenv("TRACE_PATH")
+
+# Numeric attributes summed per span name in the summary
+SUMMED_ATTRIBUTES = ("prompt_tokens", "completion_tokens", "request_bytes", "response_bytes", "cache_hits")
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "kind", "span_id", "parent_id", "start", "end", "attributes", "lane", "_token")
+
+    def __init__(self, name: str, kind: str, span_id: int, parent_id: Optional[int], start: float, lane: int, attributes: dict):
+        self.name = name
+        self.kind = kind
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = start
+        self.end = None
+        self.lane = lane
+        self.attributes = attributes
+        self._token = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def add(self, **counts) -> None:
+        """Add to numeric attributes (e.g. `span.add(cache_hits=1)`)."""
+        for key, value in counts.items():
+            self.attributes[key] = self.attributes.get(key, 0) + value
+
+
+class _NoopSpan:
+    def set(self, **attributes) -> None:
+        pass
+
+    def add(self, **counts) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Tracer:
+    """Collects spans in memory and exports them to `path` (.json: Chrome trace, otherwise JSONL)."""
+
+    def __init__(self, path: Optional[str] = None, max_spans: int = 100_000):
+        self.path = None
+        self.enabled = False
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped = 0
+        self._ids = itertools.count(1)
+        self._lanes = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._close_registered = False
+        self._origin = time.perf_counter()
+        self._origin_epoch = time.time()
+        if path:
+            self.enable(path)
+
+    def enable(self, path: Optional[str] = None) -> "Tracer":
+        """Start recording; with `path`, also export there."""
+        self.enabled = True
+        self.path = path
+        if path and not path.endswith(".json"):
+            self._file = open(path, "a", buffering=64 * 1024)
+        if path and not self._close_registered:
+            atexit.register(self.close)
+            self._close_registered = True
+        return self
+
+    def _lane(self) -> int:
+        """Chrome trace row: one per thread, or per asyncio task so concurrent spans don't overlap."""
+        try:
+            key = id(asyncio.current_task())
+        except RuntimeError:
+            key = threading.get_ident()
+        with self._lock:
+            return self._lanes.setdefault(key, len(self._lanes) + 1)
+
+    def start_span(self, name: str, kind: str = "internal", activate: bool = True, **attributes):
+        """Open a span; with `activate`, spans opened after it in this context become its children."""
+        if not self.enabled:
+            return _NOOP
+        parent = _current.get()
+        span = Span(name, kind, next(self._ids), parent.span_id if parent else None, time.perf_counter(), self._lane(), attributes)
+        if activate:
+            span._token = _current.set(span)
+        return span
+
+    def end_span(self, span, **attributes) -> None:
+        if span is _NOOP:
+            return
+        span.end = time.perf_counter()
+        span.attributes.update(attributes)
+        if span._token is not None:
+            try:
+                _current.reset(span._token)
+            except ValueError:
+                # Ended in a different context than it started (e.g. a generator closed elsewhere)
+                pass
+        self._finish(span)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes):
+        span = self.start_span(name, kind, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            self.end_span(span)
+
+    @contextmanager
+    def activated(self, span):
+        """Make `span` the parent of the spans opened inside the block.
+
+        For a span that stays open across `yield` in an async generator: open it with
+        `activate=False` and activate it only around the work done between yields, so
+        it isn't the current span while the consumer's code runs.
+        """
+        if span is _NOOP:
+            yield
+            return
+        token = _current.set(span)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    def record(self, name: str, kind: str, start: float, end: float, **attributes) -> None:
+        """Record a span that already happened (`start`/`end` from time.perf_counter())."""
+        if not self.enabled:
+            return
+        parent = _current.get()
+        span = Span(name, kind, next(self._ids), parent.span_id if parent else None, start, self._lane(), attributes)
+        span.end = end
+        self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+            if self._file is not None:
+                self._file.write(json.dumps(self._as_dict(span), default=str) + "\n")
+
+    def _as_dict(self, span: Span) -> dict:
+        return {
+            "name": span.name,
+            "kind": span.kind,
+            "id": span.span_id,
+            "parent": span.parent_id,
+            "start": self._origin_epoch + (span.start - self._origin),
+            "duration": span.duration,
+            "lane": span.lane,
+            "attributes": span.attributes,
+        }
+
+    def export_chrome(self, path: str) -> None:
+        events = [
+            {
+                "name": span.name,
+                "cat": span.kind,
+                "ph": "X",
+                "ts": (span.start - self._origin) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": os.getpid(),
+                "tid": span.lane,
+                "args": span.attributes,
+            }
+            for span in self.spans
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self.path and self.path.endswith(".json") and self.spans:
+            self.export_chrome(self.path)
+
+    def summary(self) -> dict:
+        return summarize([self._as_dict(span) for span in self.spans])
+
+    def format_summary(self) -> str:
+        return format_summary(self.summary())
+
+
+def _covered(intervals: list) -> float:
+    """Total length of the union of (start, end) intervals."""
+    covered, reach = 0.0, None
+    for start, end in sorted(intervals):
+        if reach is None or start > reach:
+            covered += end - start
+            reach = end
+        elif end > reach:
+            covered += end - reach
+            reach = end
+    return covered
+
+
+def summarize(spans: list) -> dict:
+    """Per-(kind, name) totals from span dicts.
+
+    Self time is a span's duration minus the time covered by its children, so it
+    shows where the time was actually spent. Concurrent spans each count their own
+    time, so the self shares can add up to more than 100% of the wall clock.
+    """
+    if not spans:
+        return {"wall_clock": 0.0, "spans": 0, "rows": []}
+    children = defaultdict(list)
+    for span in spans:
+        if span["parent"] is not None:
+            children[span["parent"]].append((span["start"], span["start"] + span["duration"]))
+
+    groups = defaultdict(list)
+    for span in spans:
+        groups[(span["kind"], span["name"])].append(span)
+
+    wall_clock = max(s["start"] + s["duration"] for s in spans) - min(s["start"] for s in spans)
+    rows = []
+    for (kind, name), group in groups.items():
+        durations = sorted(s["duration"] for s in group)
+        self_time = sum(max(0.0, s["duration"] - _covered(children[s["id"]])) for s in group)
+        row = {
+            "kind": kind,
+            "name": name,
+            "count": len(group),
+            "total": sum(durations),
+            "self": self_time,
+            "self_share": self_time / wall_clock if wall_clock else 0.0,
+            "p50": durations[len(durations) // 2],
+            "p95": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+            "errors": sum(1 for s in group if "error" in s["attributes"]),
+        }
+        for attribute in SUMMED_ATTRIBUTES:
+            row[attribute] = sum(s["attributes"].get(attribute) or 0 for s in group)
+        rows.append(row)
+    rows.sort(key=lambda row: row["self"], reverse=True)
+    return {"wall_clock": wall_clock, "spans": len(spans), "rows": rows}
+
+
+def format_summary(summary: dict) -> str:
+    lines = [f"{summary['spans']} spans over {summary['wall_clock']:.2f}s wall clock",
+             f"{'kind':<10} {'name':<28} {'count':>5} {'total s':>8} {'self s':>8} {'self %':>6} "
+             f"{'p50 ms':>8} {'p95 ms':>8} {'tokens in/out':>15} {'cache hits':>10}"]
+    for row in summary["rows"]:
+        tokens = f"{row['prompt_tokens']}/{row['completion_tokens']}" if row["prompt_tokens"] or row["completion_tokens"] else "-"
+        lines.append(
+            f"{row['kind']:<10} {row['name'][:28]:<28} {row['count']:>5} {row['total']:>8.2f} {row['self']:>8.2f} "
+            f"{row['self_share'] * 100:>5.1f}% {row['p50'] * 1000:>8.1f} {row['p95'] * 1000:>8.1f} "
+            f"{tokens:>15} {row['cache_hits']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def load_spans(path: str) -> list:
+    """Read spans back from a JSONL trace."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def usage_attributes(usage) -> dict:
+    """Token counts from an OpenAI or autogen usage object."""
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+    }
+
+
+def payload_size(value) -> int:
+    """Characters of text in a payload: strings, and the strings inside messages, dicts and lists."""
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(payload_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(item) for item in value)
+    # Message objects carry their text in `content`; tool calls in `arguments`
+    return payload_size(getattr(value, "content", None) or getattr(value, "arguments", None))
+
+
+def current_span():
+    """The innermost open span, or a no-op span when there is none."""
+    return _current.get() or _NOOP
+
+
+tracer = Tracer(TRACE_PATH)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python -m tools.tracing trace.jsonl")
+        sys.exit(1)
+    print(format_summary(summarize(load_spans(sys.argv[1]))))
@@ -1,71 +1,301 @@
 import aiohttp
-import json
 import asyncio
+import os
+import sys
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable, Optional
 from urllib.parse import quote_plus
 
+# Add project root to path to allow imports when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.cache import DiskCache, MemoryCache, TieredCache
+from tools.local_index import LocalIndex
+from tools.loop_resources import close_at_loop_shutdown, close_on_loop
+from tools.tracing import current_span, tracer
+
+# Base URL of the Wikipedia instance to query (override to point at a mirror or a local stand-in)
+WIKIPEDIA_BASE_URL = os.getenv("WIKIPEDIA_BASE_URL", "https://en.wikipedia.org")
+
+# Connection pool settings for the shared search session
+POOL_LIMIT = 32
+POOL_LIMIT_PER_HOST = 8
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = 15
+
+# Number of search hits to expand into full extracts
+TOP_RESULTS = 2
+
+# Result cache: an in-process LRU, plus an optional SQLite tier when WEB_SEARCH_CACHE_PATH is set.
+# Search hits and page extracts are cached separately so one extract can serve many queries.
+CACHE_TTL = 6 * 3600
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+CACHE_PATH = os.getenv("WEB_SEARCH_CACHE_PATH")
+
+cache = TieredCache(
+    MemoryCache(max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL),
+    DiskCache(CACHE_PATH, ttl=CACHE_TTL) if CACHE_PATH else None,
+)
+
+# Local full-text index (see tools/local_index.py) searched before Wikipedia when
+# WEB_SEARCH_INDEX_PATH is set. Queries without a local hit go to the HTTP API
+# unless WEB_SEARCH_HTTP_FALLBACK=0.
+INDEX_PATH = os.getenv("WEB_SEARCH_INDEX_PATH")
+HTTP_FALLBACK = os.getenv("WEB_SEARCH_HTTP_FALLBACK", "1") != "0"
+
+_session = None
+_session_loop = None
+_session_closer = None
+_local_index = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the long-lived, connection-pooled session used by every search.
+
+    The session is bound to the event loop it was created on, so a new one is
+    created if the caller is running on a different loop. Each session is closed
+    when its loop shuts down (or when replaced, if its loop still runs elsewhere).
+    """
+    global _session, _session_loop, _session_closer
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        if _session is not None and not _session.closed:
+            close_on_loop(_session.close, _session_loop)
+        connector = aiohttp.TCPConnector(
+            limit=POOL_LIMIT,
+            limit_per_host=POOL_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+        _session_loop = loop
+        _session_closer = close_at_loop_shutdown(_session.close)
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared session (call before the event loop shuts down)."""
+    global _session, _session_loop, _session_closer
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+    _session_closer = None
+
+
+def get_local_index():
+    """Return the local index, opening WEB_SEARCH_INDEX_PATH on first use (None when not configured).
+
+    Raises FileNotFoundError if the configured index doesn't exist.
+    """
+    global _local_index
+    if _local_index is None and INDEX_PATH:
+        _local_index = LocalIndex(INDEX_PATH)
+    return _local_index
+
+
+def set_local_index(index) -> None:
+    """Use `index` (anything with `search(query, limit)` returning [{"title", "extract", "url"}]) for local lookups."""
+    global _local_index
+    _local_index = index
+
+
+def _format_pages(pages: list) -> str:
+    return "\n\n---\n\n".join(f"# {page['title']}\n\n{page['extract']}\n\nSource: {page['url']}" for page in pages)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for use as a cache key (case, whitespace and trailing punctuation)."""
+    return " ".join(query.casefold().split()).rstrip("?!. ")
+
+
+def cache_stats() -> dict:
+    """Return the hit/miss/eviction counters of the search cache."""
+    return cache.stats()
+
+
+async def _fetch_search_hits(session: aiohttp.ClientSession, query: str):
+    """Return the top search hits as [{"title", "snippet"}], or None if the search request failed."""
+    search_params = {"action": "query", "list": "search", "srsearch": query, "format": "json"}
+    async with session.get(f"{WIKIPEDIA_BASE_URL}/w/api.php", params=search_params) as search_response:
+        if search_response.status != 200:
+            return None
+        search_data = await search_response.json()
+
+    search_results = search_data.get("query", {}).get("search", [])
+    return [
+        {"title": result.get("title", ""), "snippet": result.get("snippet", "")}
+        for result in search_results[:TOP_RESULTS]
+    ]
+
+
+async def _get_extracts(session: aiohttp.ClientSession, titles: list) -> dict:
+    """Return extracts for `titles`, fetching only the uncached ones in a single batched request."""
+    fetched = 0
+
+    async def fetch_missing(keys):
+        nonlocal fetched
+        missing = [key[len("extract:"):] for key in keys]
+        fetched += len(missing)
+        extracts = await _fetch_extracts(session, missing)
+        return {f"extract:{title}": extracts.get(title) or None for title in missing}
+
+    cached = await cache.get_or_fetch_many([f"extract:{title}" for title in titles], fetch_missing)
+    current_span().add(cache_hits=len(titles) - fetched, cache_misses=fetched)
+    return {title: cached.get(f"extract:{title}") or "" for title in titles}
+
+
+async def _fetch_extracts(session: aiohttp.ClientSession, titles: list) -> dict:
+    """Fetch the intro extracts of several pages in one batched request, keyed by title."""
+    params = {
+        "action": "query",
+        "prop": "extracts",
+        "exintro": "1",
+        "explaintext": "1",
+        "exlimit": str(len(titles)),
+        "titles": "|".join(titles),
+        "format": "json",
+    }
+    async with session.get(f"{WIKIPEDIA_BASE_URL}/w/api.php", params=params) as extract_response:
+        if extract_response.status != 200:
+            return {}
+        extract_data = await extract_response.json()
+
+    query = extract_data.get("query", {})
+    pages = query.get("pages", {})
+    extracts = {page.get("title", ""): page.get("extract", "") for page in pages.values()}
+
+    # Map requested titles that Wikipedia normalized or redirected back to their page
+    for mapping in query.get("normalized", []) + query.get("redirects", []):
+        if mapping.get("to") in extracts:
+            extracts.setdefault(mapping.get("from"), extracts[mapping["to"]])
+    return extracts
+
+
+async def _search(query: str) -> str:
+    """Run a search, raising on transport errors (see `web_search` for the tool wrapper)."""
+    index = get_local_index()
+    if index is not None:
+        pages = await asyncio.to_thread(index.search, query, TOP_RESULTS)
+        current_span().add(local_hits=int(bool(pages)))
+        if pages:
+            return _format_pages(pages)
+        if not HTTP_FALLBACK:
+            return f"No information found about '{query}'."
+    return await _search_wikipedia(query)
+
+
+async def _search_wikipedia(query: str) -> str:
+    """Search the Wikipedia API."""
+    encoded_query = quote_plus(query)
+    session = get_session()
+
+    # First try a direct search since it's more reliable for finding relevant pages
+    fetched = False
+
+    def fetch_hits():
+        nonlocal fetched
+        fetched = True
+        return _fetch_search_hits(session, query)
+
+    search_results = await cache.get_or_fetch(f"search:{normalize_query(query)}", fetch_hits)
+    current_span().add(cache_hits=int(not fetched), cache_misses=int(fetched))
+
+    if search_results is not None:
+        if not search_results:
+            return f"No information found about '{query}'."
+
+        # Get the intro of the top results in a single batched "extracts" request
+        titles = [result["title"] for result in search_results]
+        extracts = await _get_extracts(session, titles)
+
+        full_results = [
+            {"title": title, "extract": extracts[title], "url": f"{WIKIPEDIA_BASE_URL}/wiki/{quote_plus(title)}"}
+            for title in titles
+            if extracts.get(title)
+        ]
+        if full_results:
+            return _format_pages(full_results)
+
+        # If we couldn't get full content, fall back to snippets
+        result_title = search_results[0]["title"]
+        snippet = search_results[0]["snippet"].replace("<span class=\"searchmatch\">", "").replace("</span>", "")
+        return f"# {result_title}\n\n{snippet}\n\nMore info: {WIKIPEDIA_BASE_URL}/wiki/{quote_plus(result_title)}"
+
+    # If search fails, try direct page lookup as a fallback
+    wiki_url = f"{WIKIPEDIA_BASE_URL}/api/rest_v1/page/summary/{encoded_query}"
+    async with session.get(wiki_url) as response:
+        if response.status == 200:
+            wiki_data = await response.json()
+            extract = wiki_data.get("extract", "")
+            title = wiki_data.get("title", "")
+            if extract:
+                url = wiki_data.get("content_urls", {}).get("desktop", {}).get("page", "")
+                return f"# {title}\n\n{extract}\n\nSource: {url}"
+
+    return f"No information found about '{query}'."
+
+
 # Define a tool that searches the web for information.
 async def web_search(query: str) -> str:
     """Find information using Wikipedia's API"""
-    encoded_query = quote_plus(query)
-    
+    with tracer.span("web_search", kind="tool", request_bytes=len(query)) as span:
+        try:
+            result = await _search(query)
+        except Exception as e:
+            span.set(error=type(e).__name__)
+            result = f"Error during search: {str(e)}"
+        span.set(response_bytes=len(result))
+        return result
+
+
+@dataclass
+class SearchResult:
+    query: str
+    result: Optional[str] = None
+    error: Optional[Exception] = None
+
+
+async def web_search_many(queries: Iterable[str], max_concurrency: int = 8) -> AsyncIterator[SearchResult]:
+    """Search many queries concurrently, yielding a SearchResult per query as each completes.
+
+    Queries that normalize to the same cache key are only searched once, and the
+    result is yielded for each of them under its own spelling, so there is always
+    one SearchResult per query passed in. All searches share the pooled session, and
+    a failing query yields a result with `error` set instead of aborting the batch.
+    """
+    spellings = {}
+    for query in queries:
+        spellings.setdefault(normalize_query(query), []).append(query)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(queries: list) -> tuple:
+        async with semaphore:
+            try:
+                return queries, await _search(queries[0]), None
+            except Exception as e:
+                return queries, None, e
+
+    # Not activated: the consumer's code runs between yields and must not nest under it
+    span = tracer.start_span("web_search_many", kind="tool", activate=False, queries=len(spellings))
+    with tracer.activated(span):
+        # Each task copies the context here, so its search is a child of the batch
+        tasks = [asyncio.ensure_future(run_one(queries)) for queries in spellings.values()]
     try:
-        async with aiohttp.ClientSession() as session:
-            # First try a direct search since it's more reliable for finding relevant pages
-            search_url = f"https://en.wikipedia.org/w/api.php?action=query&list=search&srsearch={encoded_query}&format=json"
-            async with session.get(search_url) as search_response:
-                if search_response.status == 200:
-                    search_data = await search_response.json()
-                    search_results = search_data.get("query", {}).get("search", [])
-                    
-                    if not search_results:
-                        return f"No information found about '{query}'."
-                    
-                    # Get full content for the top 2 most relevant results
-                    full_results = []
-                    for result in search_results[:2]:
-                        result_title = result.get("title", "")
-                        
-                        # Get full page content using the "extracts" prop
-                        extract_url = f"https://en.wikipedia.org/w/api.php?action=query&prop=extracts&exintro=1&explaintext=1&titles={quote_plus(result_title)}&format=json"
-                        async with session.get(extract_url) as extract_response:
-                            if extract_response.status == 200:
-                                extract_data = await extract_response.json()
-                                pages = extract_data.get("query", {}).get("pages", {})
-                                
-                                # Extract the first page (there should only be one)
-                                if pages:
-                                    page_id = next(iter(pages))
-                                    page = pages[page_id]
-                                    title = page.get("title", "")
-                                    extract = page.get("extract", "")
-                                    
-                                    if extract:
-                                        wiki_url = f"https://en.wikipedia.org/wiki/{quote_plus(title)}"
-                                        full_results.append(f"# {title}\n\n{extract}\n\nSource: {wiki_url}")
-                    
-                    if full_results:
-                        return "\n\n---\n\n".join(full_results)
-                    
-                    # If we couldn't get full content, fall back to snippets
-                    result_title = search_results[0].get("title", "")
-                    snippet = search_results[0].get("snippet", "").replace("<span class=\"searchmatch\">", "").replace("</span>", "")
-                    return f"# {result_title}\n\n{snippet}\n\nMore info: https://en.wikipedia.org/wiki/{quote_plus(result_title)}"
-            
-            # If search fails, try direct page lookup as a fallback
-            wiki_url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{encoded_query}"
-            async with session.get(wiki_url) as response:
-                if response.status == 200:
-                    wiki_data = await response.json()
-                    extract = wiki_data.get("extract", "")
-                    title = wiki_data.get("title", "")
-                    if extract:
-                        url = wiki_data.get("content_urls", {}).get("desktop", {}).get("page", "")
-                        return f"# {title}\n\n{extract}\n\nSource: {url}"
-                
-            return f"No information found about '{query}'."
-            
-    except Exception as e:
-        return f"Error during search: {str(e)}"
+        for next_done in asyncio.as_completed(tasks):
+            queries, result, error = await next_done
+            for query in queries:
+                yield SearchResult(query, result=result, error=error)
+    finally:
+        # Cancel outstanding searches if the consumer stops early
+        for task in tasks:
+            task.cancel()
+        tracer.end_span(span)
+
 
 # Example usage
 async def main():
@@ -75,13 +305,15 @@ async def main():
         "Machine learning",
         "Claude AI"
     ]
-    
-    for query in queries:
-        print(f"\n\nSearching for: {query}")
-        print("-" * 50)
-        result = await web_search(query)
-        print(result)
-        print("-" * 50)
+
+    try:
+        async for search in web_search_many(queries):
+            print(f"\n\nSearching for: {search.query}")
+            print("-" * 50)
+            print(search.result if search.error is None else f"Error during search: {search.error}")
+            print("-" * 50)
+    finally:
+        await close_session()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())